@@ -6,6 +6,7 @@ block_cipher = None
 datas = [
     ('ControlCAN.dll', '.'),
     ('can_protocol_config.py', '.'),
+    ('can_new_add.csv', '.'),
     ('BQC.ico','.'),
 ]
 
@@ -23,6 +24,25 @@ hiddenimports = [
     'json',
     'struct',
     'can_protocol_config',
+    'can_log_writer',
+    'can_capture',
+    'can_replay',
+    'can_scheduler',
+    'can_watchdog',
+    'can_receiver',
+    'can_filter',
+    'can_aggregator',
+    'can_timestamp',
+    'can_bus_health',
+    'can_backends',
+    'can_canalyst',
+    'can_simulator',
+    'can_headless',
+    'can_frame',
+    'can_change_detect',
+    'can_decode_cache',
+    'can_flags',
+    'can_identity',
 ]
 
 # 分析
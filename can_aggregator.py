@@ -0,0 +1,201 @@
+# 多通道/多设备接收合并：每个通道一个读取线程，按对齐后的时间合并为一条时间线
+
+import heapq
+import threading
+import time
+from collections import deque
+
+from can_backends import CANBackend
+from can_receiver import ReceiveEngine, RX_MAX_FRAMES
+from can_timestamp import DeviceClock
+
+# 通道读取后在合并队列中最多等待的时间（秒），超过后即使其他通道尚未追上也放行
+MERGE_REORDER_WINDOW = 0.05
+
+# 每个通道合并队列的最大帧数，超过时丢弃最旧的帧
+MERGE_QUEUE_LIMIT = 20000
+
+
+class ChannelReader:
+    """单个通道的读取线程及其待合并队列，同一设备的通道共用一个时钟映射"""
+    def __init__(self, bus, channel, device=0, clock=None, queue_limit=MERGE_QUEUE_LIMIT):
+        self.bus = bus
+        self.channel = channel
+        self.device = device
+        self.clock = clock or DeviceClock()
+        self.queue = deque()  # (展开后的硬件计数, 读取时的主机时间, 报文)
+        self.queue_limit = queue_limit
+        self.engine = ReceiveEngine(bus)
+        self.thread = None
+        self.last_timestamp = None
+        self.idle = True
+        self.received = 0
+        self.dropped = 0
+        self.error = None
+
+    @property
+    def tag(self):
+        return (self.device, self.channel)
+
+
+class MultiChannelBus(CANBackend):
+    """把多个已连接通道（可来自多个设备）合并为一个总线，receive()/send() 接口与 CANalystCANBus 一致
+
+    每个通道由独立线程读取，报文标记 channel、device 后放入各自有界队列，
+    放行时写入换算到主机单调时钟的 time；receive() 按对齐时间多路归并：不晚于所有活动通道已读到的最新时间的帧
+    可以安全放行，空闲通道不阻塞合并，等待超过 reorder_window 的帧直接放行。
+    同一设备的各通道共用一个硬件时钟，不同设备的时钟按估计的偏移对齐。
+    """
+    hardware_timestamps = True  # 报文已带 time
+
+    def __init__(self, readers, reorder_window=MERGE_REORDER_WINDOW, tx_index=0):
+        self.readers = list(readers)
+        self.reorder_window = reorder_window
+        self.tx_index = tx_index
+        self.is_connected = False
+        self._cond = threading.Condition()
+        self._running = False
+
+    @classmethod
+    def from_buses(cls, buses, device=0, **kwargs):
+        """由同一设备的 [(通道号, 总线)] 创建"""
+        return cls.from_sources([(device, channel, bus) for channel, bus in buses], **kwargs)
+
+    @classmethod
+    def from_sources(cls, sources, **kwargs):
+        """由 [(设备索引, 通道号, 总线)] 创建，同一设备的通道共用时钟映射"""
+        clocks = {}
+        readers = []
+        for device, channel, bus in sources:
+            clock = clocks.setdefault(device, DeviceClock())
+            readers.append(ChannelReader(bus, channel, device, clock))
+        return cls(readers, **kwargs)
+
+    @property
+    def tx_bus(self):
+        return self.readers[self.tx_index].bus
+
+    def connect(self, baudrate=None):
+        """启动各通道读取线程（通道总线需已连接）"""
+        self._running = True
+        for reader in self.readers:
+            reader.thread = threading.Thread(target=self._read_loop, args=(reader,),
+                                             name=f'ChannelReader-{reader.device}-{reader.channel}',
+                                             daemon=True)
+            reader.thread.start()
+        self.is_connected = True
+        return True
+
+    def disconnect(self):
+        """停止读取线程并断开各通道（先断开不负责关闭设备的通道）"""
+        self._running = False
+        self.is_connected = False
+        for reader in self.readers:
+            reader.engine.stop()
+        with self._cond:
+            self._cond.notify_all()
+        for reader in self.readers:
+            if reader.thread and reader.thread.is_alive():
+                reader.thread.join(timeout=1)
+        for reader in reversed(self.readers):
+            reader.bus.disconnect()
+
+    def send(self, can_id, data):
+        return self.tx_bus.send(can_id, data)
+
+    def send_batch(self, frames):
+        send_batch = getattr(self.tx_bus, 'send_batch', None)
+        if send_batch is not None:
+            return send_batch(frames)
+        accepted = 0
+        for can_id, data in frames:
+            try:
+                self.tx_bus.send(can_id, data)
+            except Exception:
+                break
+            accepted += 1
+        return accepted
+
+    def _read_loop(self, reader):
+        while self._running:
+            try:
+                messages = reader.engine.poll()
+            except Exception as e:
+                reader.error = e
+                messages = None
+                time.sleep(0.1)
+            now = time.monotonic()
+            with self._cond:
+                if messages:
+                    queue = reader.queue
+                    clock = reader.clock
+                    # 展开计数器回绕；用本批最后一帧更新时钟映射：它距读取时刻最近，延迟最小
+                    ticks = [clock.unwrap(msg.timestamp) for msg in messages]
+                    clock.update(ticks[-1], now)
+                    for msg, value in zip(messages, ticks):
+                        msg.channel = reader.channel
+                        msg.device = reader.device
+                        queue.append((value, now, msg))
+                    reader.last_timestamp = queue[-1][0]
+                    reader.received += len(messages)
+                    overflow = len(queue) - reader.queue_limit
+                    for _ in range(max(0, overflow)):
+                        queue.popleft()
+                    reader.dropped += max(0, overflow)
+                    reader.idle = False
+                else:
+                    reader.idle = True
+                self._cond.notify_all()
+
+    def _watermark(self):
+        """可以安全放行的最大对齐时间：所有活动通道已读到的最新时间中的最小值"""
+        active = [reader.clock.to_host(reader.last_timestamp) for reader in self.readers
+                  if not reader.idle and reader.last_timestamp is not None]
+        return min(active) if active else None
+
+    def _release(self, now, max_frames=RX_MAX_FRAMES):
+        """按对齐时间归并放行可以确定顺序的帧，一次最多max_frames帧
+
+        对齐时间在放行时用当前偏移换算，一次归并内同一设备的帧始终按硬件时间戳排序
+        """
+        watermark = self._watermark()
+        readers = self.readers
+        heads = [(reader.clock.to_host(reader.queue[0][0]), i)
+                 for i, reader in enumerate(readers) if reader.queue]
+        heapq.heapify(heads)
+        released = []
+        while heads and len(released) < max_frames:
+            aligned, i = heads[0]
+            reader = readers[i]
+            queue = reader.queue
+            _, host_time, msg = queue[0]
+            if watermark is not None and aligned > watermark and now - host_time < self.reorder_window:
+                break
+            queue.popleft()
+            msg.time = aligned
+            released.append(msg)
+            if queue:
+                heapq.heapreplace(heads, (reader.clock.to_host(queue[0][0]), i))
+            else:
+                heapq.heappop(heads)
+        return released
+
+    def receive(self, timeout=100, max_frames=RX_MAX_FRAMES):
+        """返回已按时间戳排序的一批报文（最多max_frames帧），没有时最多等待timeout毫秒"""
+        if not self.is_connected:
+            return None
+        deadline = time.monotonic() + timeout / 1000.0
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                released = self._release(now, max_frames)
+                if released or now >= deadline or not self._running:
+                    return released or None
+                self._cond.wait(min(deadline - now, self.reorder_window))
+
+    def stats(self):
+        """返回各通道的接收、丢弃、排队帧数和时钟偏移，键为 (设备, 通道)"""
+        with self._cond:
+            return {reader.tag: {'received': reader.received, 'dropped': reader.dropped,
+                                 'queued': len(reader.queue), 'clock': reader.clock.stats()}
+                    for reader in self.readers}
@@ -0,0 +1,205 @@
+# 总线后端：统一的连接/发送/批量接收接口，运行时按名称选择实现
+
+import sys
+from abc import ABC, abstractmethod
+
+from can_filter import expand_ids, SoftwareFilter, STANDARD_ID_MASK
+from can_frame import CANFrame
+from can_receiver import RX_MAX_FRAMES
+
+try:
+    import can  # 可选依赖：python-can，提供SocketCAN与进程内virtual总线
+except ImportError:
+    can = None
+
+# 未指定时使用的后端：Windows上为CANalyst，其他平台为SocketCAN
+DEFAULT_BACKEND = 'canalyst' if sys.platform == 'win32' else 'socketcan'
+
+
+class CANBackend(ABC):
+    """总线后端接口
+
+    connect(baudrate) / disconnect() 打开和关闭总线（open/close为同义接口）；
+    send(can_id, data) 发送一帧，send_batch(frames) 返回按顺序被接受的帧数；
+    receive(timeout, max_frames) 返回一批CANFrame，没有报文时返回None。
+    connect/disconnect/send/receive 为抽象方法，缺少任一实现的后端在创建时即报错。
+    hardware_timestamps 为True时 'timestamp' 是设备计数，由TimestampService换算，否则以读取时刻为准。
+    """
+    hardware_timestamps = False
+    device_index = 0
+    can_index = 0
+    is_connected = False
+
+    @abstractmethod
+    def connect(self, baudrate=500000):
+        raise NotImplementedError
+
+    @abstractmethod
+    def disconnect(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def send(self, can_id, data):
+        raise NotImplementedError
+
+    def send_batch(self, frames):
+        """逐帧发送，遇到第一个失败即停止，返回已发送的帧数"""
+        accepted = 0
+        for can_id, data in frames:
+            try:
+                self.send(can_id, data)
+            except Exception:
+                break
+            accepted += 1
+        return accepted
+
+    @abstractmethod
+    def receive(self, timeout=100, max_frames=RX_MAX_FRAMES):
+        raise NotImplementedError
+
+    def open(self, *args, **kwargs):
+        return self.connect(*args, **kwargs)
+
+    def close(self):
+        return self.disconnect()
+
+
+class PythonCANBus(CANBackend):
+    """基于python-can的后端：Linux SocketCAN（can0等）或进程内 virtual 总线
+
+    SocketCAN的波特率由系统配置（ip link set can0 type can bitrate 500000），接收过滤通过内核过滤器实现；
+    virtual总线同名通道在进程内互通，用于无硬件的负载测试，接收过滤由软件位图完成
+    （python-can的软件过滤在不等待读取时遇到被滤掉的帧就返回None，无法一次读空队列）。
+    """
+    def __init__(self, interface='socketcan', channel='can0', accept_ids=None, **bus_options):
+        self.interface = interface
+        self.channel = channel
+        self.accept_ids = expand_ids(accept_ids) if accept_ids else None
+        self.software_filter = None
+        if self.accept_ids and interface != 'socketcan':
+            self.software_filter = SoftwareFilter(self.accept_ids)
+        self.bus_options = bus_options
+        self.is_connected = False
+        self.receive_errors = 0  # 收到的错误帧数
+        self.sw_rejected = 0     # 软件位图拒绝的帧数
+        self._bus = None
+
+    def connect(self, baudrate=500000):
+        if can is None:
+            raise Exception(f"{self.interface}后端需要安装 python-can")
+        filters = None
+        if self.accept_ids and self.software_filter is None:
+            filters = [{'can_id': can_id, 'can_mask': STANDARD_ID_MASK, 'extended': False}
+                       for can_id in self.accept_ids]
+        try:
+            self._bus = can.Bus(interface=self.interface, channel=self.channel, bitrate=baudrate,
+                                can_filters=filters, **self.bus_options)
+        except Exception as e:
+            raise Exception(f"连接CAN设备失败: {str(e)}")
+        self.is_connected = True
+        return True
+
+    def disconnect(self):
+        if self._bus is not None:
+            self._bus.shutdown()
+            self._bus = None
+        self.is_connected = False
+
+    def send(self, can_id, data):
+        if not self.is_connected:
+            raise Exception("CAN设备未连接")
+        message = can.Message(arbitration_id=can_id, data=bytes(data[:8]),
+                              is_extended_id=can_id > STANDARD_ID_MASK)
+        try:
+            self._bus.send(message)
+        except can.CanError as e:
+            raise Exception(f"发送CAN报文失败: {str(e)}")
+
+    def receive(self, timeout=100, max_frames=RX_MAX_FRAMES):
+        """等待第一帧最多timeout毫秒，之后不等待地读出已到达的报文"""
+        if not self.is_connected:
+            return None
+        bus = self._bus
+        software_filter = self.software_filter
+        messages = []
+        message = bus.recv(timeout / 1000.0)
+        while message is not None:
+            if message.is_error_frame:
+                self.receive_errors += 1
+            elif software_filter is not None and (message.is_extended_id or
+                                                  not software_filter.accepts(message.arbitration_id)):
+                self.sw_rejected += 1
+            else:
+                messages.append(CANFrame(message.arbitration_id, bytes(message.data), message.timestamp))
+                if len(messages) >= max_frames:
+                    break
+            message = bus.recv(0)
+        return messages or None
+
+
+def _channel_name(channel, prefix):
+    """数字通道号按后端习惯补全名称（0 -> can0），字符串原样使用"""
+    if isinstance(channel, int):
+        return f"{prefix}{channel}"
+    return channel
+
+
+def _create_canalyst(device_index=0, channel=0, accept_ids=None, **_):
+    from can_canalyst import CANalystCANBus, VCI_USBCAN2
+    return CANalystCANBus(VCI_USBCAN2, int(device_index), int(channel), accept_ids=accept_ids)
+
+
+def _create_socketcan(channel=0, accept_ids=None, **_):
+    return PythonCANBus('socketcan', _channel_name(channel, 'can'), accept_ids)
+
+
+def _create_virtual(channel=0, accept_ids=None, **_):
+    return PythonCANBus('virtual', _channel_name(channel, 'vcan'), accept_ids)
+
+
+def _create_simulator(**_):
+    from can_simulator import FakeCANBus
+    return FakeCANBus()
+
+
+def _create_replay(filename=None, speed=1.0, loop=False, **_):
+    from can_replay import ReplayCANBus
+    if not filename:
+        raise ValueError("回放后端需要指定捕获文件")
+    return ReplayCANBus(filename, speed=speed, loop=loop)
+
+
+# 后端名称 -> 工厂函数；各实现在创建时才导入，缺少的依赖只影响对应后端
+BACKENDS = {
+    'canalyst': _create_canalyst,
+    'socketcan': _create_socketcan,
+    'virtual': _create_virtual,
+    'simulator': _create_simulator,
+    'replay': _create_replay,
+}
+
+
+def available_backends():
+    """返回当前平台可用的后端名称"""
+    names = []
+    for name in BACKENDS:
+        if name == 'canalyst' and sys.platform != 'win32':
+            continue
+        if name in ('socketcan', 'virtual') and can is None:
+            continue
+        if name == 'socketcan' and not sys.platform.startswith('linux'):
+            continue
+        names.append(name)
+    return names
+
+
+def create_bus(backend=DEFAULT_BACKEND, **options):
+    """按名称创建（未连接的）总线
+
+    options 传给对应工厂，如 channel、device_index、accept_ids、filename，对该后端无意义的选项被忽略
+    """
+    try:
+        factory = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"未知的总线后端: {backend}（可选: {', '.join(BACKENDS)}）")
+    return factory(**options)
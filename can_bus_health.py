@@ -0,0 +1,187 @@
+# 总线健康统计：低频轮询控制器错误信息与状态寄存器
+
+import csv
+import threading
+import time
+from collections import deque
+
+# VCI_ReadErrInfo 错误码
+ERR_CAN_OVERFLOW = 0x0001    # CAN控制器内部FIFO溢出
+ERR_CAN_ERRALARM = 0x0002    # 错误报警
+ERR_CAN_PASSIVE = 0x0004     # 错误被动
+ERR_CAN_LOSE = 0x0008        # 仲裁丢失
+ERR_CAN_BUSERR = 0x0010      # 总线错误
+ERR_CAN_BUSOFF = 0x0020      # 总线关闭
+ERR_BUFFEROVERFLOW = 0x0800  # 设备接收缓冲区溢出
+
+# SJA1000状态寄存器：bit7 总线关闭，bit6 错误状态
+SJA1000_STATUS_BUS_OFF = 0x80
+SJA1000_STATUS_ERROR = 0x40
+
+# 轮询间隔（秒）与保留的历史记录条数
+BUS_HEALTH_INTERVAL = 1.0
+BUS_HEALTH_HISTORY = 3600
+
+EXPORT_FIELDS = ['time', 'device', 'channel', 'rec', 'tec', 'bus_off', 'overruns', 'bus_off_events',
+                 'passive_events', 'arbitration_lost', 'bus_errors', 'receive_errors',
+                 'host_rx_frames', 'host_rx_per_sec', 'host_drops', 'host_drops_per_sec']
+
+
+class ChannelHealth:
+    """一个通道的错误计数与状态"""
+    def __init__(self, tag):
+        self.tag = tag
+        self.rec = 0
+        self.tec = 0
+        self.max_rec = 0
+        self.max_tec = 0
+        self.bus_off = False
+        self.overruns = 0          # 出现溢出标志的轮询次数（每次读取错误信息后设备清除标志，为下限）
+        self.bus_off_events = 0
+        self.passive_events = 0
+        self.arbitration_lost = 0
+        self.bus_errors = 0
+        self.receive_errors = 0
+        # 主机从设备读到的帧数（VCI_Receive 返回值累计）；ControlCAN 不提供控制器收到的总帧数
+        self.host_rx_frames = 0
+        self.host_rx_per_sec = 0.0
+        self.read_failures = 0
+
+    def as_dict(self):
+        return {key: value for key, value in vars(self).items() if key != 'tag'}
+
+
+class BusHealthMonitor:
+    """后台线程低频读取各通道的 VCI_ReadErrInfo / VCI_ReadCANStatus
+
+    把错误码和寄存器换算为累计计数与速率（RX/TX错误计数、溢出、总线关闭、主机侧丢弃），
+    保留历史记录供导出CSV。帧速率为主机侧接收计数（设备不提供硬件帧计数）；
+    不提供这些接口的总线只统计主机接收帧数和主机侧丢弃。
+    """
+    def __init__(self, sources, host_drops=None, interval=BUS_HEALTH_INTERVAL,
+                 history=BUS_HEALTH_HISTORY):
+        self.sources = list(sources)  # [((设备, 通道), 总线)]
+        self.host_drops = host_drops
+        self.interval = interval
+        self.channels = {tag: ChannelHealth(tag) for tag, _ in self.sources}
+        self.history = deque(maxlen=history)
+        self.host_drop_count = 0
+        self.host_drops_per_sec = 0.0
+        self._last_poll = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='BusHealthMonitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"读取总线状态失败: {e}")
+
+    def poll(self, now=None):
+        """读取一次全部通道并更新计数"""
+        if now is None:
+            now = time.monotonic()
+        elapsed = now - self._last_poll if self._last_poll is not None else None
+        self._last_poll = now
+        rows = []
+        host_drops = self.host_drops() if self.host_drops else 0
+        with self._lock:
+            if elapsed:
+                self.host_drops_per_sec = max(0, host_drops - self.host_drop_count) / elapsed
+            self.host_drop_count = host_drops
+            for tag, bus in self.sources:
+                health = self.channels[tag]
+                self._poll_channel(health, bus, elapsed)
+                rows.append(self._row(now, health))
+            self.history.extend(rows)
+
+    def _poll_channel(self, health, bus, elapsed):
+        read_err_info = getattr(bus, 'read_err_info', None)
+        err_code = 0
+        if read_err_info is not None:
+            info = read_err_info()
+            if info is None:
+                health.read_failures += 1
+            else:
+                err_code = info['err_code']
+                if err_code & (ERR_CAN_OVERFLOW | ERR_BUFFEROVERFLOW):
+                    health.overruns += 1
+                if err_code & ERR_CAN_PASSIVE:
+                    health.passive_events += 1
+                if err_code & ERR_CAN_LOSE:
+                    health.arbitration_lost += 1
+                if err_code & ERR_CAN_BUSERR:
+                    health.bus_errors += 1
+
+        bus_off = bool(err_code & ERR_CAN_BUSOFF)
+        read_can_status = getattr(bus, 'read_can_status', None)
+        if read_can_status is not None:
+            status = read_can_status()
+            if status is None:
+                health.read_failures += 1
+            else:
+                health.rec = status['rec']
+                health.tec = status['tec']
+                health.max_rec = max(health.max_rec, health.rec)
+                health.max_tec = max(health.max_tec, health.tec)
+                bus_off = bus_off or bool(status['status'] & SJA1000_STATUS_BUS_OFF)
+        if bus_off and not health.bus_off:
+            health.bus_off_events += 1
+        health.bus_off = bus_off
+
+        health.receive_errors = getattr(bus, 'receive_errors', 0)
+        # hw_passed 是主机读到的帧数（硬件过滤后），不是控制器的硬件帧计数
+        frames = getattr(bus, 'hw_passed', None)
+        if frames is not None:
+            if elapsed:
+                health.host_rx_per_sec = max(0, frames - health.host_rx_frames) / elapsed
+            health.host_rx_frames = frames
+
+    def _row(self, now, health):
+        device, channel = health.tag
+        return {
+            'time': round(now, 3), 'device': device, 'channel': channel,
+            'rec': health.rec, 'tec': health.tec, 'bus_off': int(health.bus_off),
+            'overruns': health.overruns, 'bus_off_events': health.bus_off_events,
+            'passive_events': health.passive_events, 'arbitration_lost': health.arbitration_lost,
+            'bus_errors': health.bus_errors, 'receive_errors': health.receive_errors,
+            'host_rx_frames': health.host_rx_frames, 'host_rx_per_sec': round(health.host_rx_per_sec, 1),
+            'host_drops': self.host_drop_count, 'host_drops_per_sec': round(self.host_drops_per_sec, 1),
+        }
+
+    def summary(self):
+        """汇总全部通道：错误计数取最大值，事件计数求和"""
+        with self._lock:
+            channels = list(self.channels.values())
+            return {
+                'rec': max((h.rec for h in channels), default=0),
+                'tec': max((h.tec for h in channels), default=0),
+                'bus_off': any(h.bus_off for h in channels),
+                'overruns': sum(h.overruns for h in channels),
+                'bus_off_events': sum(h.bus_off_events for h in channels),
+                'receive_errors': sum(h.receive_errors for h in channels),
+                'host_rx_per_sec': sum(h.host_rx_per_sec for h in channels),
+                'host_drops': self.host_drop_count,
+            }
+
+    def export_csv(self, filename):
+        """把历史记录导出为CSV，返回导出的行数"""
+        with self._lock:
+            rows = list(self.history)
+        with open(filename, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
@@ -0,0 +1,410 @@
+# 创芯科技CANalyst-II后端：ControlCAN.dll 的结构体定义、接收批次与总线实现
+
+import struct
+import ctypes
+from ctypes import *
+
+from can_backends import CANBackend
+from can_capture import FLAG_REMOTE, FLAG_EXTENDED
+from can_filter import compute_acceptance_filter, SoftwareFilter, ACCEPT_ALL, STANDARD_ID_COUNT
+from can_frame import CANFrame
+from can_protocol_config import decode_batch
+
+try:
+    import numpy as np  # 可选依赖：提供结构化数组视图
+except ImportError:
+    np = None
+
+# 创芯科技CAN API常量
+VCI_USBCAN2 = 4
+STATUS_OK = 1
+
+# 接收缓冲区大小（VCI_Receive单次最多读取的报文数）
+RX_BUFFER_SIZE = 2500
+
+# 单次VCI_Transmit最多提交的报文数
+TX_BATCH_SIZE = 64
+
+
+class VCI_INIT_CONFIG(Structure):  
+    _fields_ = [("AccCode", c_uint),
+                ("AccMask", c_uint),
+                ("Reserved", c_uint),
+                ("Filter", c_ubyte),
+                ("Timing0", c_ubyte),
+                ("Timing1", c_ubyte),
+                ("Mode", c_ubyte)
+                ]  
+
+class VCI_CAN_OBJ(Structure):  
+    _fields_ = [("ID", c_uint),
+                ("TimeStamp", c_uint),
+                ("TimeFlag", c_ubyte),
+                ("SendType", c_ubyte),
+                ("RemoteFlag", c_ubyte),
+                ("ExternFlag", c_ubyte),
+                ("DataLen", c_ubyte),
+                ("Data", c_ubyte*8),
+                ("Reserved", c_ubyte*3)
+                ] 
+
+class VCI_CAN_OBJ_ARRAY(Structure):
+    _fields_ = [('SIZE', ctypes.c_uint16), ('STRUCT_ARRAY', ctypes.POINTER(VCI_CAN_OBJ))]
+
+    def __init__(self, num_of_structs):
+        self.STRUCT_ARRAY = ctypes.cast((VCI_CAN_OBJ * num_of_structs)(), ctypes.POINTER(VCI_CAN_OBJ))
+        self.SIZE = num_of_structs
+        self.ADDR = self.STRUCT_ARRAY[0]
+
+class VCI_ERR_INFO(Structure):
+    _fields_ = [("ErrCode", c_uint),
+                ("Passive_ErrData", c_ubyte*3),
+                ("ArLost_ErrData", c_ubyte)
+                ]
+
+class VCI_CAN_STATUS(Structure):
+    _fields_ = [("ErrInterrupt", c_ubyte),
+                ("regMode", c_ubyte),
+                ("regStatus", c_ubyte),
+                ("regALCapture", c_ubyte),
+                ("regECCapture", c_ubyte),
+                ("regEWLimit", c_ubyte),
+                ("regRECounter", c_ubyte),
+                ("regTECounter", c_ubyte),
+                ("Reserved", c_uint)
+                ]
+
+# VCI_CAN_OBJ 的内存布局（24字节，小端），用于直接从接收缓冲区取字段
+VCI_CAN_OBJ_FORMAT = struct.Struct('<IIBBBBB8s3x')
+VCI_CAN_OBJ_SIZE = VCI_CAN_OBJ_FORMAT.size
+VCI_DATA_OFFSET = VCI_CAN_OBJ.Data.offset
+
+if np is not None:
+    VCI_CAN_OBJ_DTYPE = np.dtype([('ID', '<u4'), ('TimeStamp', '<u4'),
+                                  ('TimeFlag', 'u1'), ('SendType', 'u1'),
+                                  ('RemoteFlag', 'u1'), ('ExternFlag', 'u1'),
+                                  ('DataLen', 'u1'), ('Data', 'u1', (8,)),
+                                  ('Reserved', 'u1', (3,))])
+else:
+    VCI_CAN_OBJ_DTYPE = None
+
+class CANFrameBatch:
+    """一次VCI_Receive得到的报文批次，字段以视图方式直接引用接收缓冲区
+
+    缓冲区在每个连接上只分配一次，下一次接收会覆盖其内容；
+    需要跨批次保留的数据请调用 to_frames() 物化。
+    """
+    __slots__ = ('_buffer', '_view', 'count')
+
+    def __init__(self, buffer, count):
+        self._buffer = buffer
+        self._view = memoryview(buffer).cast('B')[:count * VCI_CAN_OBJ_SIZE]
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """逐帧迭代 (id, timestamp, dlc, payload)，payload为缓冲区上的memoryview"""
+        view = self._view
+        for i, fields in enumerate(VCI_CAN_OBJ_FORMAT.iter_unpack(view)):
+            start = i * VCI_CAN_OBJ_SIZE + VCI_DATA_OFFSET
+            yield fields[0], fields[1], fields[6], view[start:start + min(fields[6], 8)]
+
+    def raw_records(self):
+        """逐帧迭代 (id, timestamp, flags, dlc, data8)，flags按捕获格式编码远程帧/扩展帧"""
+        for can_id, timestamp, _, _, remote, extern, dlc, data in VCI_CAN_OBJ_FORMAT.iter_unpack(self._view):
+            flags = (FLAG_REMOTE if remote else 0) | (FLAG_EXTENDED if extern else 0)
+            yield can_id, timestamp, flags, dlc, data
+
+    def id_at(self, index):
+        return struct.unpack_from('<I', self._view, index * VCI_CAN_OBJ_SIZE)[0]
+
+    def timestamp_at(self, index):
+        return struct.unpack_from('<I', self._view, index * VCI_CAN_OBJ_SIZE + 4)[0]
+
+    def dlc_at(self, index):
+        return min(self._view[index * VCI_CAN_OBJ_SIZE + VCI_CAN_OBJ.DataLen.offset], 8)
+
+    def payload_at(self, index):
+        """返回第index帧数据区的memoryview（零拷贝）"""
+        start = index * VCI_CAN_OBJ_SIZE + VCI_DATA_OFFSET
+        return self._view[start:start + self.dlc_at(index)]
+
+    def as_array(self):
+        """以NumPy结构化数组视图返回整个批次（需要安装numpy，不复制数据）"""
+        if np is None:
+            raise RuntimeError("as_array() 需要安装 numpy")
+        return np.frombuffer(self._buffer, dtype=VCI_CAN_OBJ_DTYPE, count=self.count)
+
+    def compact(self, software_filter):
+        """按软件过滤位图就地压缩批次，只保留通过的帧，返回被拒绝的帧数"""
+        count = self.count
+        if np is not None:
+            frames = self.as_array()
+            ids = frames['ID']
+            keep = (ids < STANDARD_ID_COUNT) & (frames['ExternFlag'] == 0)
+            keep[keep] = software_filter.lookup[ids[keep]]
+            kept = int(np.count_nonzero(keep))
+            if kept < count:
+                frames[:kept] = frames[keep]
+        else:
+            view = self._view
+            bitmap = software_filter.bitmap
+            kept = 0
+            for i in range(count):
+                start = i * VCI_CAN_OBJ_SIZE
+                can_id = struct.unpack_from('<I', view, start)[0]
+                if can_id >= STANDARD_ID_COUNT or view[start + VCI_CAN_OBJ.ExternFlag.offset] \
+                        or not bitmap[can_id]:
+                    continue
+                if kept != i:
+                    dest = kept * VCI_CAN_OBJ_SIZE
+                    view[dest:dest + VCI_CAN_OBJ_SIZE] = view[start:start + VCI_CAN_OBJ_SIZE]
+                kept += 1
+        if kept < count:
+            self._view = self._view[:kept * VCI_CAN_OBJ_SIZE]
+            self.count = kept
+        return count - kept
+
+    def decode(self):
+        """对整个批次做向量化解码（需要安装numpy），返回decode_batch的列式结果"""
+        frames = self.as_array()
+        return decode_batch(frames['ID'], frames['Data'], frames['DataLen'])
+
+    def to_frames(self):
+        """物化为CANFrame列表（数据区复制为bytes，不再引用接收缓冲区）"""
+        return [CANFrame(can_id, data[:dlc] if dlc < 8 else data, timestamp)
+                for can_id, timestamp, _, _, _, _, dlc, data in VCI_CAN_OBJ_FORMAT.iter_unpack(self._view)]
+
+class CANalystCANBus(CANBackend):
+    """创芯科技CAN总线类（仅Windows，需要ControlCAN.dll）"""
+    hardware_timestamps = True  # 'timestamp' 为0.1ms硬件计数
+    
+    def __init__(self, device_type=VCI_USBCAN2, device_index=0, can_index=0, accept_ids=None):
+        self.device_type = device_type
+        self.device_index = device_index
+        self.can_index = can_index
+        self.can_dll = None
+        self.is_connected = False
+        self._rx_buffer = None  # 接收缓冲区，每次连接分配一次
+        self._tx_buffer = None  # 批量发送缓冲区，按需扩容
+        self._baudrate = 500000
+        self._owns_device = True
+        
+        # 接收过滤：硬件验收滤波尽量收窄，其余由软件位图精确过滤
+        self.acceptance = ACCEPT_ALL
+        self.software_filter = None
+        self.hw_passed = 0    # 硬件放行（VCI_Receive读到）的帧数
+        self.sw_rejected = 0  # 软件位图拒绝的帧数
+        self.sw_passed = 0    # 最终交给上层的帧数
+        self.receive_errors = 0  # VCI_Receive返回负值的次数
+        if accept_ids:
+            self.set_filter(accept_ids)
+    
+    def set_filter(self, accept_ids=None):
+        """设置只接收的ID（ID或(起始, 结束)区间），None表示接收全部；已连接时重新初始化CAN"""
+        if accept_ids:
+            self.acceptance = compute_acceptance_filter(accept_ids)
+            software_filter = SoftwareFilter(accept_ids)
+            # 硬件已经精确过滤时不需要软件位图
+            self.software_filter = software_filter if self.acceptance.accepted > len(software_filter.ids) else None
+        else:
+            self.acceptance = ACCEPT_ALL
+            self.software_filter = None
+        if self.is_connected:
+            self.can_dll.VCI_ResetCAN(self.device_type, self.device_index, self.can_index)
+            self._init_can()
+    
+    def filter_stats(self):
+        """返回接收过滤统计（硬件拒绝的帧数设备无法报告）"""
+        return {
+            'hw_passed': self.hw_passed,
+            'sw_rejected': self.sw_rejected,
+            'sw_passed': self.sw_passed,
+            'hw_accepted_ids': self.acceptance.accepted,
+        }
+    
+    def _init_can(self):
+        """按当前波特率和验收滤波初始化并启动CAN通道"""
+        timing0, timing1 = self.get_timing(self._baudrate)
+        acceptance = self.acceptance
+        vci_initconfig = VCI_INIT_CONFIG(acceptance.acc_code, acceptance.acc_mask, 0,
+                                       acceptance.mode, timing0, timing1, 0)
+        ret = self.can_dll.VCI_InitCAN(self.device_type, self.device_index, 
+                                      self.can_index, byref(vci_initconfig))
+        if ret != STATUS_OK:
+            raise Exception("初始化CAN失败")
+            
+        # 启动CAN
+        ret = self.can_dll.VCI_StartCAN(self.device_type, self.device_index, self.can_index)
+        if ret != STATUS_OK:
+            raise Exception("启动CAN失败")
+        
+    def connect(self, baudrate=500000, open_device=True):
+        """连接CAN设备
+
+        open_device为False时只初始化本通道，设备由同一设备上的另一通道打开和关闭
+        """
+        try:
+            # 加载DLL
+            if not hasattr(ctypes, 'windll'):
+                raise Exception("CANalyst后端需要Windows和ControlCAN.dll，其他平台请使用socketcan/virtual后端")
+            self.can_dll = ctypes.windll.LoadLibrary('./ControlCAN.dll')
+            
+            # 打开设备
+            if open_device:
+                ret = self.can_dll.VCI_OpenDevice(self.device_type, self.device_index, 0)
+                if ret != STATUS_OK:
+                    raise Exception("打开设备失败")
+            self._owns_device = open_device
+                
+            # 设置波特率和验收滤波，初始化并启动CAN
+            self._baudrate = baudrate
+            self._init_can()
+                
+            self._rx_buffer = (VCI_CAN_OBJ * RX_BUFFER_SIZE)()
+            self.is_connected = True
+            return True
+            
+        except Exception as e:
+            raise Exception(f"连接CAN设备失败: {str(e)}")
+            
+    def get_timing(self, baudrate):
+        """根据波特率获取定时参数"""
+        timing_map = {
+            250000: (0x03, 0x1C),  # 250kbps
+            500000: (0x00, 0x1C),  # 500kbps
+        }
+        return timing_map.get(baudrate, (0x00, 0x1C))
+        
+    def send(self, can_id, data):
+        """发送CAN报文"""
+        if not self.is_connected:
+            raise Exception("CAN设备未连接")
+            
+        # 创建数据数组
+        ubyte_array = c_ubyte * 8
+        can_data = ubyte_array(*data[:8])
+        
+        # 创建CAN对象
+        ubyte_3array = c_ubyte * 3
+        reserved = ubyte_3array(0, 0, 0)
+        vci_can_obj = VCI_CAN_OBJ(can_id, 0, 0, 1, 0, 0, len(data), can_data, reserved)
+        
+        # 发送数据
+        ret = self.can_dll.VCI_Transmit(self.device_type, self.device_index, 
+                                       self.can_index, byref(vci_can_obj), 1)
+        if ret != STATUS_OK:
+            raise Exception("发送CAN报文失败")
+            
+    def send_batch(self, frames):
+        """批量发送CAN报文
+
+        frames为(can_id, data)序列，打包进一段连续的VCI_CAN_OBJ数组后
+        通过一次VCI_Transmit提交，返回设备实际接受的帧数（按顺序从头计算）
+        """
+        if not self.is_connected:
+            raise Exception("CAN设备未连接")
+        count = len(frames)
+        if count == 0:
+            return 0
+
+        if self._tx_buffer is None or len(self._tx_buffer) < count:
+            self._tx_buffer = (VCI_CAN_OBJ * max(count, TX_BATCH_SIZE))()
+        base = addressof(self._tx_buffer)
+        for i, (can_id, data) in enumerate(frames):
+            obj = self._tx_buffer[i]
+            payload = bytes(data[:8])
+            obj.ID = can_id
+            obj.SendType = 1
+            obj.RemoteFlag = 0
+            obj.ExternFlag = 0
+            obj.DataLen = len(payload)
+            memmove(base + i * VCI_CAN_OBJ_SIZE + VCI_DATA_OFFSET, payload, len(payload))
+
+        ret = self.can_dll.VCI_Transmit(self.device_type, self.device_index,
+                                       self.can_index, byref(self._tx_buffer), count)
+        # 返回值为实际发送成功的帧数，出错时为负数
+        return max(0, min(ret, count))
+
+    def pending(self):
+        """查询接收缓冲区中尚未读取的帧数（VCI_GetReceiveNum）"""
+        if not self.is_connected:
+            return 0
+        ret = self.can_dll.VCI_GetReceiveNum(self.device_type, self.device_index, self.can_index)
+        return max(0, ret)
+
+    def receive(self, timeout=100, max_frames=RX_BUFFER_SIZE):
+        """接收CAN报文（返回CANFrame列表）"""
+        batch = self.receive_batch(timeout, max_frames)
+        if batch is None:
+            return None
+        return batch.to_frames()
+
+    def receive_batch(self, timeout=100, max_frames=RX_BUFFER_SIZE):
+        """接收CAN报文，返回复用接收缓冲区的CANFrameBatch"""
+        if not self.is_connected:
+            return None
+            
+        try:
+            # 接收数据（缓冲区在connect时分配，这里直接复用）
+            ret = self.can_dll.VCI_Receive(self.device_type, self.device_index, 
+                                          self.can_index, byref(self._rx_buffer),
+                                          min(max_frames, RX_BUFFER_SIZE), timeout)
+            
+            if ret > 0:
+                self.hw_passed += ret
+                batch = CANFrameBatch(self._rx_buffer, ret)
+                if self.software_filter is not None:
+                    # 在物化为Python对象之前丢弃不需要的帧
+                    self.sw_rejected += batch.compact(self.software_filter)
+                    if not batch:
+                        return None
+                self.sw_passed += len(batch)
+                return batch
+            elif ret == 0:
+                # 超时，没有接收到数据
+                return None
+            else:
+                # 接收错误，计入总线健康统计
+                self.receive_errors += 1
+                print(f"VCI_Receive返回错误: {ret}")
+                return None
+                
+        except Exception as e:
+            print(f"接收CAN报文错误: {str(e)}")
+            return None
+        
+    def read_err_info(self):
+        """读取并清除错误信息（VCI_ReadErrInfo），失败时返回None"""
+        if not self.is_connected:
+            return None
+        info = VCI_ERR_INFO()
+        ret = self.can_dll.VCI_ReadErrInfo(self.device_type, self.device_index, self.can_index, byref(info))
+        if ret != STATUS_OK:
+            return None
+        return {'err_code': info.ErrCode,
+                'passive': bytes(info.Passive_ErrData),
+                'arbitration_lost': info.ArLost_ErrData}
+
+    def read_can_status(self):
+        """读取控制器状态寄存器与收发错误计数（VCI_ReadCANStatus），失败时返回None"""
+        if not self.is_connected:
+            return None
+        status = VCI_CAN_STATUS()
+        ret = self.can_dll.VCI_ReadCANStatus(self.device_type, self.device_index, self.can_index, byref(status))
+        if ret != STATUS_OK:
+            return None
+        return {'status': status.regStatus, 'mode': status.regMode,
+                'rec': status.regRECounter, 'tec': status.regTECounter}
+
+    def disconnect(self):
+        """断开连接"""
+        if self.can_dll and self.is_connected:
+            if self._owns_device:
+                self.can_dll.VCI_CloseDevice(self.device_type, self.device_index)
+            else:
+                self.can_dll.VCI_ResetCAN(self.device_type, self.device_index, self.can_index)
+            self.is_connected = False
+            self._rx_buffer = None
@@ -0,0 +1,187 @@
+# 原始CAN报文二进制捕获格式
+#
+# 文件结构：32字节文件头 + 定长记录
+#   文件头: 魔数(8s) 版本(H) 记录长度(H) 创建时间(d, Unix时间) 保留(12x)
+#   记录:   主机时间(d) 硬件时间戳(I, 0.1ms) ID(I) 标志(B) 数据长度(B) 通道(B) 设备(B) 数据(8s)
+
+import mmap
+import struct
+import threading
+import time
+from collections import namedtuple
+
+try:
+    import numpy as np  # 可选依赖：批量写入与结构化数组读取
+except ImportError:
+    np = None
+
+CAPTURE_MAGIC = b'CANCAP01'
+CAPTURE_VERSION = 1
+
+CAPTURE_HEADER = struct.Struct('<8sHHd12x')
+CAPTURE_RECORD = struct.Struct('<dIIBBBB8s')
+CAPTURE_HEADER_SIZE = CAPTURE_HEADER.size
+CAPTURE_RECORD_SIZE = CAPTURE_RECORD.size
+
+# 标志位
+FLAG_REMOTE = 0x01
+FLAG_EXTENDED = 0x02
+
+if np is not None:
+    CAPTURE_DTYPE = np.dtype([('host_time', '<f8'), ('timestamp', '<u4'), ('id', '<u4'),
+                              ('flags', 'u1'), ('dlc', 'u1'), ('channel', 'u1'), ('device', 'u1'),
+                              ('data', 'u1', (8,))])
+else:
+    CAPTURE_DTYPE = None
+
+CaptureRecord = namedtuple('CaptureRecord', ['host_time', 'timestamp', 'id', 'flags', 'dlc',
+                                             'channel', 'device', 'data'])
+
+
+class CaptureWriter:
+    """把接收到的报文写成定长二进制记录，可直接从接收缓冲区批量写入"""
+    def __init__(self, filename, buffer_records=4096):
+        self.filename = filename
+        self._file = open(filename, 'wb')
+        self._file.write(CAPTURE_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION,
+                                             CAPTURE_RECORD_SIZE, time.time()))
+        self._buffer = bytearray(CAPTURE_RECORD_SIZE * buffer_records)
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self.frames_written = 0
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def write_batch(self, batch, host_time=None, channel=0, device=0):
+        """写入一个CANFrameBatch，字段直接取自接收缓冲区；关闭后调用时不写入"""
+        count = len(batch)
+        if count == 0:
+            return
+        if host_time is None:
+            host_time = time.time()
+        with self._lock:
+            if self._file.closed:
+                # 界面线程可能在接收线程取到写入器后关闭了它
+                return
+            if np is not None:
+                frames = batch.as_array()
+                records = np.zeros(count, dtype=CAPTURE_DTYPE)
+                records['host_time'] = host_time
+                records['timestamp'] = frames['TimeStamp']
+                records['id'] = frames['ID']
+                records['flags'] = (frames['RemoteFlag'] != 0) * FLAG_REMOTE | \
+                                   (frames['ExternFlag'] != 0) * FLAG_EXTENDED
+                records['dlc'] = frames['DataLen']
+                records['channel'] = channel
+                records['device'] = device
+                records['data'] = frames['Data']
+                self._flush_buffer()
+                self._file.write(records.tobytes())
+            else:
+                for can_id, timestamp, flags, dlc, data in batch.raw_records():
+                    self._append(host_time, timestamp, can_id, flags, dlc, channel, device, data)
+            self.frames_written += count
+
+    def write_frame(self, can_id, data, timestamp=0, host_time=None, flags=0, channel=0, device=0):
+        """写入单帧（用于不提供接收缓冲区的总线）；关闭后调用时不写入"""
+        if host_time is None:
+            host_time = time.time()
+        data = bytes(data[:8])
+        with self._lock:
+            if self._file.closed:
+                return
+            self._append(host_time, timestamp, can_id, flags, len(data), channel, device, data)
+            self.frames_written += 1
+
+    def _append(self, host_time, timestamp, can_id, flags, dlc, channel, device, data):
+        if (self._buffered + 1) * CAPTURE_RECORD_SIZE > len(self._buffer):
+            self._flush_buffer()
+        CAPTURE_RECORD.pack_into(self._buffer, self._buffered * CAPTURE_RECORD_SIZE,
+                                 host_time, timestamp & 0xFFFFFFFF, can_id, flags, dlc,
+                                 channel, device, data)
+        self._buffered += 1
+
+    def _flush_buffer(self):
+        if self._buffered:
+            self._file.write(memoryview(self._buffer)[:self._buffered * CAPTURE_RECORD_SIZE])
+            self._buffered = 0
+
+    def flush(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush_buffer()
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush_buffer()
+            self._file.close()
+
+
+class CaptureReader:
+    """以内存映射方式读取捕获文件"""
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"捕获文件为空: {filename}")
+        if len(self._mmap) < CAPTURE_HEADER_SIZE:
+            self.close()
+            raise ValueError(f"捕获文件头不完整: {filename}")
+        magic, version, record_size, start_time = CAPTURE_HEADER.unpack_from(self._mmap)
+        if magic != CAPTURE_MAGIC or record_size != CAPTURE_RECORD_SIZE:
+            self.close()
+            raise ValueError(f"不是有效的捕获文件: {filename}")
+        self.version = version
+        self.start_time = start_time
+        # 末尾不完整的记录（例如写入中断）忽略
+        self.count = (len(self._mmap) - CAPTURE_HEADER_SIZE) // CAPTURE_RECORD_SIZE
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return CaptureRecord._make(CAPTURE_RECORD.unpack_from(
+            self._mmap, CAPTURE_HEADER_SIZE + index * CAPTURE_RECORD_SIZE))
+
+    def __iter__(self):
+        view = memoryview(self._mmap)[CAPTURE_HEADER_SIZE:
+                                      CAPTURE_HEADER_SIZE + self.count * CAPTURE_RECORD_SIZE]
+        try:
+            for fields in CAPTURE_RECORD.iter_unpack(view):
+                yield CaptureRecord._make(fields)
+        finally:
+            view.release()
+
+    def as_array(self):
+        """以NumPy结构化数组视图返回全部记录（不复制数据，需要安装numpy）"""
+        if np is None:
+            raise RuntimeError("as_array() 需要安装 numpy")
+        return np.frombuffer(self._mmap, dtype=CAPTURE_DTYPE, count=self.count,
+                             offset=CAPTURE_HEADER_SIZE)
+
+    def close(self):
+        try:
+            self._mmap.close()
+        except (AttributeError, BufferError):
+            # 仍有数组视图引用映射时，随视图释放
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
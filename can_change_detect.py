@@ -0,0 +1,58 @@
+# 报文变化检测：数据与同ID上一帧完全相同时跳过解析和界面更新
+
+STANDARD_ID_COUNT = 0x800  # 11位标准帧ID空间
+
+
+class PayloadChangeDetector:
+    """按CAN ID缓存上一帧的数据区
+
+    observe() 总会更新该ID的最近到达时间和帧数，返回False表示数据与上一帧相同，
+    调用方只需做计数和超时监视，不必解析、格式化和写表格。标准帧用按ID索引的列表，扩展帧用字典。
+    """
+    def __init__(self):
+        self.hits = 0    # 数据未变化的帧数
+        self.misses = 0  # 首次出现或数据变化的帧数
+        self.reset()
+
+    def reset(self):
+        """清空缓存（表格重建、重新连接后调用），之后每个ID的下一帧都视为变化"""
+        self._payloads = [None] * STANDARD_ID_COUNT
+        self._extended = {}
+        self.last_seen = {}  # CAN ID -> 最近到达时间（主机单调时钟）
+        self.counts = {}     # CAN ID -> 帧数
+
+    def observe(self, frame):
+        """记录一帧，数据与该ID上一帧不同（或首次出现）时返回True"""
+        can_id = frame.id
+        data = frame.data
+        self.last_seen[can_id] = frame.time
+        self.counts[can_id] = self.counts.get(can_id, 0) + 1
+        if can_id < STANDARD_ID_COUNT:
+            payloads = self._payloads
+            if payloads[can_id] == data:
+                self.hits += 1
+                return False
+            payloads[can_id] = data
+        else:
+            if self._extended.get(can_id) == data:
+                self.hits += 1
+                return False
+            self._extended[can_id] = data
+        self.misses += 1
+        return True
+
+    def forget(self, can_id):
+        """让某个ID的下一帧重新解析"""
+        if can_id < STANDARD_ID_COUNT:
+            self._payloads[can_id] = None
+        else:
+            self._extended.pop(can_id, None)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate,
+                'ids': len(self.counts)}
@@ -0,0 +1,120 @@
+# 解码结果缓存：按 (报文系列, 数据区) 记忆不可变的解码结果，LRU淘汰
+
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from can_protocol_config import lookup_message_route
+
+# 缓存的最大条目数
+DECODE_CACHE_SIZE = 4096
+
+# 默认启用缓存的报文系列：位域为主的报警/状态报文，数据区取值少、重复多。
+# 版本字符串与MAC地址（0x450-0x4A0）由 can_identity.BatteryIdentityStore 按电池重组和去重，不经此缓存
+CACHED_FAMILIES = frozenset({
+    0x35A,                          # BMS警告和报警
+    0x200,                          # 电池模式、状态和报警位
+})
+
+
+def _freeze(value):
+    """把解析结果中的字典、列表转换为只读视图和元组"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class DecodedRecord(Mapping):
+    """不可变的解码结果
+
+    同一数据区的字段在各电池之间共享，battery_address 取自报文ID，在读取时替换。
+    """
+    __slots__ = ('_fields', '_battery_address')
+
+    def __init__(self, fields, battery_address=None):
+        self._fields = fields
+        self._battery_address = battery_address
+
+    def __getitem__(self, key):
+        if key == 'battery_address' and self._battery_address is not None and key in self._fields:
+            return self._battery_address
+        return self._fields[key]
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class DecodeCache:
+    """解码结果的LRU缓存
+
+    只缓存 families 中的报文系列，其余报文直接解析；按电池地址区分的系列以系列ID为键，
+    不同电池的相同数据区共用一个条目。统计命中、未命中、淘汰和不缓存的次数。
+    """
+    def __init__(self, maxsize=DECODE_CACHE_SIZE, families=CACHED_FAMILIES):
+        self.maxsize = maxsize
+        self.families = frozenset(families)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.uncached = 0
+
+    def parse(self, can_id, data):
+        """与 parse_can_message 相同的接口，不支持的ID返回None"""
+        route = lookup_message_route(can_id)
+        if route is None:
+            return None
+        return self.decode(route, data)
+
+    def decode(self, route, data):
+        """按分发表项解码一帧，缓存的系列返回DecodedRecord"""
+        family = route.family
+        if family not in self.families:
+            self.uncached += 1
+            return route.decoder(data)
+
+        key = (family, data if type(data) is bytes else bytes(data))
+        entries = self._entries
+        with self._lock:
+            fields = entries.get(key)
+            if fields is not None:
+                entries.move_to_end(key)
+                self.hits += 1
+                return DecodedRecord(fields, route.battery_address)
+
+        result = route.decoder(data)
+        if result is None:
+            return None
+        fields = _freeze(result)
+        with self._lock:
+            self.misses += 1
+            entries[key] = fields
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+                self.evictions += 1
+        return DecodedRecord(fields, route.battery_address)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions,
+                    'uncached': self.uncached, 'hit_rate': self.hit_rate}
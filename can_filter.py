@@ -0,0 +1,145 @@
+# 接收验收滤波：SJA1000验收码/屏蔽码计算与软件位图过滤
+
+from collections import namedtuple
+
+try:
+    import numpy as np  # 可选依赖：批量过滤使用
+except ImportError:
+    np = None
+
+STANDARD_ID_COUNT = 0x800  # 11位标准帧ID空间
+STANDARD_ID_MASK = 0x7FF
+
+# VCI_INIT_CONFIG.Filter 取值
+ACC_DUAL_FILTER = 0
+ACC_SINGLE_FILTER = 1
+
+# 单滤波：ID位于验收码bit31..21，其余位（RTR、数据字节）不关心
+SINGLE_ID_SHIFT = 21
+SINGLE_DONT_CARE = (1 << SINGLE_ID_SHIFT) - 1
+# 双滤波：滤波器1的ID位于bit31..21，滤波器2位于bit15..5，RTR和数据半字节不关心
+DUAL_ID_SHIFTS = (21, 5)
+DUAL_DONT_CARE = 0x001F001F
+
+# 接收所有报文（原连接配置）
+AcceptanceFilter = namedtuple('AcceptanceFilter', ['acc_code', 'acc_mask', 'mode', 'accepted'])
+ACCEPT_ALL = AcceptanceFilter(0x80000008, 0xFFFFFFFF, ACC_DUAL_FILTER, STANDARD_ID_COUNT)
+
+
+def expand_ids(spec):
+    """把ID或(起始, 结束)闭区间组成的序列展开为排序后的ID列表"""
+    ids = set()
+    for item in spec:
+        if isinstance(item, (tuple, list, range)):
+            if isinstance(item, range):
+                lo, hi = item.start, item.stop - 1
+            else:
+                lo, hi = item
+            ids.update(range(lo, hi + 1))
+        else:
+            ids.add(int(item))
+    for can_id in ids:
+        if not 0 <= can_id < STANDARD_ID_COUNT:
+            raise ValueError(f"验收滤波只支持11位标准帧ID: 0x{can_id:X}")
+    return sorted(ids)
+
+
+def _cover(ids):
+    """返回覆盖一组ID的 (验收码, 不关心位)，以及硬件实际放行的ID数量"""
+    code = ids[0]
+    varying = 0
+    for can_id in ids:
+        varying |= can_id ^ code
+    code &= ~varying & STANDARD_ID_MASK
+    return code, varying, 1 << bin(varying).count('1')
+
+
+def _best_split(ids):
+    """把ID分成两组使两组覆盖的ID总数最少：尝试排序后的每个切分点和按每一位划分"""
+    n = len(ids)
+    best = None
+
+    # 排序后的连续切分：前缀/后缀的与、或累积
+    prefix = []
+    acc_and, acc_or = STANDARD_ID_MASK, 0
+    for can_id in ids:
+        acc_and &= can_id
+        acc_or |= can_id
+        prefix.append((acc_and, acc_or))
+    suffix = [None] * n
+    acc_and, acc_or = STANDARD_ID_MASK, 0
+    for i in range(n - 1, -1, -1):
+        acc_and &= ids[i]
+        acc_or |= ids[i]
+        suffix[i] = (acc_and, acc_or)
+    for i in range(1, n):
+        cost = (1 << bin(prefix[i - 1][0] ^ prefix[i - 1][1]).count('1')) + \
+               (1 << bin(suffix[i][0] ^ suffix[i][1]).count('1'))
+        if best is None or cost < best[0]:
+            best = (cost, ids[:i], ids[i:])
+
+    # 按单个ID位划分
+    for bit in range(11):
+        low = [can_id for can_id in ids if not can_id & (1 << bit)]
+        high = [can_id for can_id in ids if can_id & (1 << bit)]
+        if low and high:
+            cost = _cover(low)[2] + _cover(high)[2]
+            if cost < best[0]:
+                best = (cost, low, high)
+    return best
+
+
+def compute_acceptance_filter(ids):
+    """为一组标准帧ID计算最紧的验收码/屏蔽码
+
+    比较单滤波（一组）与双滤波（两组）各自放行的ID数量，取较少者；
+    屏蔽码位为1表示不关心。ids为空时返回接收全部的配置。
+    """
+    ids = expand_ids(ids)
+    if not ids:
+        return ACCEPT_ALL
+
+    code, varying, accepted = _cover(ids)
+    single = AcceptanceFilter(code << SINGLE_ID_SHIFT,
+                              (varying << SINGLE_ID_SHIFT) | SINGLE_DONT_CARE,
+                              ACC_SINGLE_FILTER, accepted)
+    if len(ids) < 2 or accepted == len(ids):
+        return single
+
+    _, group1, group2 = _best_split(ids)
+    code1, varying1, accepted1 = _cover(group1)
+    code2, varying2, accepted2 = _cover(group2)
+    dual_accepted = accepted1 + accepted2
+    if dual_accepted >= accepted:
+        return single
+    shift1, shift2 = DUAL_ID_SHIFTS
+    return AcceptanceFilter((code1 << shift1) | (code2 << shift2),
+                            (varying1 << shift1) | (varying2 << shift2) | DUAL_DONT_CARE,
+                            ACC_DUAL_FILTER, dual_accepted)
+
+
+def hardware_accepts(acceptance, can_id):
+    """按验收码/屏蔽码判断硬件是否放行某个标准帧ID（用于核对与诊断）"""
+    if acceptance.mode == ACC_SINGLE_FILTER:
+        shifts = (SINGLE_ID_SHIFT,)
+    else:
+        shifts = DUAL_ID_SHIFTS
+    for shift in shifts:
+        code = (acceptance.acc_code >> shift) & STANDARD_ID_MASK
+        care = ~(acceptance.acc_mask >> shift) & STANDARD_ID_MASK
+        if (can_id ^ code) & care == 0:
+            return True
+    return False
+
+
+class SoftwareFilter:
+    """精确的ID位图过滤，处理硬件验收滤波放行的多余ID"""
+    def __init__(self, ids):
+        self.ids = expand_ids(ids)
+        self.bitmap = bytearray(STANDARD_ID_COUNT)
+        for can_id in self.ids:
+            self.bitmap[can_id] = 1
+        self.lookup = np.frombuffer(bytes(self.bitmap), dtype=bool) if np is not None else None
+
+    def accepts(self, can_id):
+        return can_id < STANDARD_ID_COUNT and self.bitmap[can_id] == 1
@@ -0,0 +1,81 @@
+# 位标志：报警、警告和状态位以原始整数保存，名称表按报文系列共享，只在显示时展开
+
+from collections.abc import Mapping
+
+
+class FlagTable:
+    """一组位标志的名称与掩码（掩码可以占多位，任一位置位即视为该标志置位）"""
+    __slots__ = ('names', 'masks', 'index', 'mask')
+
+    def __init__(self, flags):
+        self.names = tuple(name for name, _ in flags)
+        self.masks = tuple(mask for _, mask in flags)
+        self.index = dict(flags)
+        self.mask = 0
+        for mask in self.masks:
+            self.mask |= mask
+
+    def __len__(self):
+        return len(self.names)
+
+    def active(self, bits):
+        """返回置位的标志名称"""
+        if not bits & self.mask:
+            return []
+        return [name for name, mask in zip(self.names, self.masks) if bits & mask]
+
+    def changes(self, old, new):
+        """与上一次的原始值比较，返回 (新置位的名称, 新清除的名称)；异或为0时不逐位检查"""
+        if not (old ^ new) & self.mask:
+            return [], []
+        set_names = []
+        cleared_names = []
+        for name, mask in zip(self.names, self.masks):
+            was = old & mask
+            now = new & mask
+            if now and not was:
+                set_names.append(name)
+            elif was and not now:
+                cleared_names.append(name)
+        return set_names, cleared_names
+
+
+class FlagSet(Mapping):
+    """原始位域值加共享名称表，按名称读取时返回bool，不为每帧构建字典"""
+    __slots__ = ('bits', 'table')
+
+    def __init__(self, bits, table):
+        self.bits = bits
+        self.table = table
+
+    def __getitem__(self, name):
+        return bool(self.bits & self.table.index[name])
+
+    def __iter__(self):
+        return iter(self.table.names)
+
+    def __len__(self):
+        return len(self.table.names)
+
+    def any(self):
+        """是否有任一标志置位"""
+        return bool(self.bits & self.table.mask)
+
+    def active(self):
+        return self.table.active(self.bits)
+
+    def changes(self, previous):
+        """与上一帧的FlagSet或原始值比较，返回 (新置位的名称, 新清除的名称)"""
+        old = previous.bits if isinstance(previous, FlagSet) else previous
+        return self.table.changes(old, self.bits)
+
+    def __eq__(self, other):
+        if isinstance(other, FlagSet) and other.table is self.table:
+            return not (self.bits ^ other.bits) & self.table.mask
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return hash((id(self.table), self.bits & self.table.mask))
+
+    def __repr__(self):
+        return f"FlagSet(0x{self.bits:X}: {', '.join(self.active()) or '-'})"
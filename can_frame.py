@@ -0,0 +1,35 @@
+# CAN报文帧：总线、解析和界面各层共用的紧凑表示
+
+
+class CANFrame:
+    """一帧CAN报文
+
+    data 为不可变的bytes；timestamp 为后端给出的原始时间戳（设备计数或秒），
+    time 为换算到主机单调时钟的时间（由TimestampService或多通道合并写入，未换算时为None）；
+    channel/device 只在多通道合并时标记。十六进制文本第一次使用时生成并缓存。
+    """
+    __slots__ = ('id', 'data', 'timestamp', 'time', 'channel', 'device', '_hex')
+
+    def __init__(self, can_id, data, timestamp=0, channel=None, device=None, time=None):
+        self.id = can_id
+        self.data = data if type(data) is bytes else bytes(data)
+        self.timestamp = timestamp
+        self.time = time
+        self.channel = channel
+        self.device = device
+        self._hex = None
+
+    @property
+    def length(self):
+        return len(self.data)
+
+    @property
+    def hex(self):
+        """数据区的十六进制文本（缓存）"""
+        text = self._hex
+        if text is None:
+            text = self._hex = self.data.hex()
+        return text
+
+    def __repr__(self):
+        return f"CANFrame(id=0x{self.id:03X}, data={self.hex}, timestamp={self.timestamp})"
@@ -0,0 +1,208 @@
+# 无界面运行：接收、解析并写日志，用于Linux网关和负载测试
+
+import argparse
+import time
+from datetime import datetime
+
+from can_backends import BACKENDS, DEFAULT_BACKEND, create_bus
+from can_log_writer import AsyncLogWriter
+from can_protocol_config import lookup_message_route, protocol_receive_ids, MESSAGE_PERIODS, HEARTBEAT_TIMEOUT
+from can_change_detect import PayloadChangeDetector
+from can_decode_cache import DecodeCache
+from can_flags import FlagSet
+from can_identity import BatteryIdentityStore, IDENTITY_FAMILIES
+from can_receiver import ReceiveEngine
+from can_timestamp import TimestampService
+from can_watchdog import StreamWatchdog, STREAM_STALE
+
+# 统计输出间隔（秒）
+HEADLESS_STATS_INTERVAL = 5.0
+
+# 带位域字段的报文系列：记录每次置位/清除的标志
+FLAG_FIELDS = {
+    0x35A: ('alarms', 'warnings'),
+    0x200: ('status', 'alarms'),
+}
+
+
+class HeadlessRunner:
+    """不依赖Tk的接收链路：ReceiveEngine读取 -> 打时间戳 -> 分发表解析 -> 异步写日志，同时做报文超时监视"""
+    def __init__(self, bus, log_writer=None, stats_interval=HEADLESS_STATS_INTERVAL, report=print):
+        self.bus = bus
+        self.log_writer = log_writer
+        self.stats_interval = stats_interval
+        self.report = report
+        self.engine = ReceiveEngine(bus)
+        self.timestamp_service = TimestampService()
+        self.watchdog = StreamWatchdog(MESSAGE_PERIODS)
+        self.watchdog.set_timeout(0x351, HEARTBEAT_TIMEOUT)
+        self.change_detector = PayloadChangeDetector()
+        self.decode_cache = DecodeCache()
+        self.flag_bits = {}  # (CAN ID, 字段) -> 上一次的位域原始值
+        self.identity_store = BatteryIdentityStore()
+        self.frames = 0
+        self.decoded = 0
+        self.unknown = 0
+        self.decode_errors = 0
+        self._running = False
+        self._started = None
+
+    def log(self, message):
+        if self.log_writer:
+            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+            self.log_writer.write(f"[{timestamp}] {message}\n")
+
+    def process(self, messages):
+        """解析一批报文并喂给超时监视"""
+        self.timestamp_service.stamp(messages, time.monotonic(), device=getattr(self.bus, 'device_index', 0),
+                                     hardware=getattr(self.bus, 'hardware_timestamps', False))
+        self.frames += len(messages)
+        for msg in messages:
+            msg_id = msg.id
+            route = lookup_message_route(msg_id)
+            if route is None:
+                self.unknown += 1
+                continue
+            if not self.change_detector.observe(msg):
+                # 数据未变化：只喂超时监视，不重复解析和写日志
+                self.watchdog.feed(route.family, route.battery_address, msg.time)
+                continue
+            try:
+                parsed = self.decode_cache.decode(route, msg.data)
+            except Exception as e:
+                self.decode_errors += 1
+                self.log(f"解析报文失败: ID=0x{msg_id:03X}, 数据: {msg.hex}, 错误: {e}")
+                continue
+            self.decoded += 1
+            self.watchdog.feed(route.family, route.battery_address, msg.time)
+            fields = FLAG_FIELDS.get(route.family)
+            if fields:
+                self.log_flag_changes(msg_id, parsed, fields)
+            elif route.family in IDENTITY_FAMILIES:
+                identity = self.identity_store.observe(msg_id, msg.data, msg.time)
+                if identity is not None and identity.complete:
+                    self.log(f"电池{identity.battery_address} 身份信息: 控制器版本 {identity.controller_version}, "
+                             f"BMS版本 {identity.bms_version}, MAC {identity.esp32_mac_address}, "
+                             f"模块ID {identity.module_id}")
+            if self.log_writer:
+                channel = msg.channel
+                prefix = f"CH{channel} " if channel is not None else ""
+                self.log(f"解析报文: {prefix}ID=0x{msg_id:03X}, 数据: {msg.hex}, 结果: {parsed}")
+
+    def log_flag_changes(self, msg_id, parsed, fields):
+        """与同ID上一帧的位域异或，记录置位和清除的标志"""
+        for field in fields:
+            flags = parsed.get(field)
+            if not isinstance(flags, FlagSet):
+                continue
+            key = (msg_id, field)
+            previous = self.flag_bits.get(key)
+            self.flag_bits[key] = flags.bits
+            if previous is None:
+                continue
+            set_names, cleared_names = flags.changes(previous)
+            if set_names or cleared_names:
+                self.log(f"0x{msg_id:03X} {field} 变化: 置位 {', '.join(set_names) or '-'}; "
+                         f"清除 {', '.join(cleared_names) or '-'}")
+
+    def handle_watchdog_event(self, event):
+        if event.kind == STREAM_STALE:
+            message = (f"警告: 电池{event.battery_address} 报文0x{event.family:03X} "
+                       f"超过{event.timeout:g}秒未更新")
+        else:
+            message = f"电池{event.battery_address} 报文0x{event.family:03X} 已恢复"
+        self.log(message)
+        self.report(message)
+        if self.log_writer and event.kind == STREAM_STALE:
+            self.log_writer.flush()
+
+    def stats(self):
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        return {
+            'frames': self.frames,
+            'decoded': self.decoded,
+            'unknown': self.unknown,
+            'decode_errors': self.decode_errors,
+            'repeat_rate': self.change_detector.hit_rate,
+            'cache_hit_rate': self.decode_cache.hit_rate,
+            'fps': self.frames / elapsed if elapsed > 0 else 0.0,
+            'elapsed': elapsed,
+            'receive': dict(self.engine.metrics),
+        }
+
+    def report_stats(self):
+        st = self.stats()
+        self.report(f"接收 {st['frames']} 帧（{st['fps']:.0f} 帧/秒），解析 {st['decoded']}，"
+                    f"未知ID {st['unknown']}，解析失败 {st['decode_errors']}，重复 {st['repeat_rate']:.0%}，"
+                    f"解码缓存命中 {st['cache_hit_rate']:.0%}，"
+                    f"每次轮询 {st['receive']['frames_per_poll']:.1f} 帧")
+
+    def run(self, duration=None):
+        """运行接收循环，直到stop()、到达duration秒或Ctrl+C"""
+        self._running = True
+        self._started = time.monotonic()
+        deadline = self._started + duration if duration else None
+        next_report = self._started + self.stats_interval
+        try:
+            while self._running:
+                messages = self.engine.poll()
+                if messages:
+                    self.process(messages)
+                for event in self.watchdog.check():
+                    self.handle_watchdog_event(event)
+                now = time.monotonic()
+                if now >= next_report:
+                    self.report_stats()
+                    next_report = now + self.stats_interval
+                if deadline is not None and now >= deadline:
+                    break
+                if getattr(self.bus, 'finished', False):
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._running = False
+        return self.stats()
+
+    def stop(self):
+        self._running = False
+        self.engine.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面接收、解析并记录CAN报文")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default=DEFAULT_BACKEND, help="总线后端")
+    parser.add_argument('--channel', default='0', help="通道：数字（CANalyst通道号，或补全为can0/vcan0）或接口名")
+    parser.add_argument('--device', type=int, default=0, help="CANalyst设备索引")
+    parser.add_argument('--bitrate', type=int, default=500000, help="波特率（SocketCAN由系统配置）")
+    parser.add_argument('--filter', action='store_true', help="仅接收协议报文")
+    parser.add_argument('--replay', help="回放后端的捕获文件(.cancap)")
+    parser.add_argument('--speed', type=float, default=1.0, help="回放速度倍数，0为最快速度")
+    parser.add_argument('--duration', type=float, help="运行秒数，不指定则运行到Ctrl+C")
+    parser.add_argument('--log', help="解析日志文件")
+    parser.add_argument('--identity-csv', help="结束时把电池身份信息导出到CSV文件")
+    parser.add_argument('--stats-interval', type=float, default=HEADLESS_STATS_INTERVAL, help="统计输出间隔（秒）")
+    args = parser.parse_args(argv)
+
+    channel = int(args.channel) if args.channel.isdigit() else args.channel
+    bus = create_bus(args.backend, channel=channel, device_index=args.device,
+                     accept_ids=protocol_receive_ids() if args.filter else None,
+                     filename=args.replay, speed=args.speed)
+    bus.connect(args.bitrate)
+    log_writer = AsyncLogWriter(args.log) if args.log else None
+    runner = HeadlessRunner(bus, log_writer, stats_interval=args.stats_interval)
+    print(f"总线后端: {args.backend}, 通道: {channel}，开始接收")
+    try:
+        runner.run(args.duration)
+    finally:
+        bus.disconnect()
+        if log_writer:
+            log_writer.close()
+    runner.report_stats()
+    if args.identity_csv:
+        rows = runner.identity_store.export_csv(args.identity_csv)
+        print(f"身份信息已导出 {rows} 条: {args.identity_csv}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,20 +2,30 @@ import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
 import threading
 import time
+from collections import deque, namedtuple
+from collections.abc import Mapping
 from datetime import datetime
 import json
-import struct
-import ctypes
-from ctypes import *
 from can_protocol_config import *  # 导入配置文件
 from lang_config import LANGUAGES
+from can_log_writer import AsyncLogWriter
+from can_capture import CaptureWriter
+from can_scheduler import PeriodicScheduler
+from can_watchdog import StreamWatchdog, STREAM_STALE
+from can_receiver import ReceiveEngine, RX_MIN_INTERVAL
+from can_filter import ACCEPT_ALL
+from can_aggregator import MultiChannelBus
+from can_timestamp import TimestampService
+from can_bus_health import BusHealthMonitor
+from can_canalyst import VCI_USBCAN2, RX_BUFFER_SIZE, TX_BATCH_SIZE, CANalystCANBus
+from can_backends import create_bus, available_backends, DEFAULT_BACKEND
+from can_change_detect import PayloadChangeDetector
+from can_decode_cache import DecodeCache
+from can_flags import FlagSet
+from can_identity import BatteryIdentityStore, IDENTITY_FAMILIES
 import sys
 import os
 
-# 创芯科技CAN API常量
-VCI_USBCAN2 = 4
-STATUS_OK = 1
-
 def get_resource_path(filename):
     """
     获取资源文件路径，兼容开发环境和PyInstaller打包后的环境
@@ -29,148 +39,88 @@ def get_resource_path(filename):
     return os.path.join(base_path, filename)
 
 
-class VCI_INIT_CONFIG(Structure):  
-    _fields_ = [("AccCode", c_uint),
-                ("AccMask", c_uint),
-                ("Reserved", c_uint),
-                ("Filter", c_ubyte),
-                ("Timing0", c_ubyte),
-                ("Timing1", c_ubyte),
-                ("Mode", c_ubyte)
-                ]  
+class CANTxQueue:
+    """批量发送队列
 
-class VCI_CAN_OBJ(Structure):  
-    _fields_ = [("ID", c_uint),
-                ("TimeStamp", c_uint),
-                ("TimeFlag", c_ubyte),
-                ("SendType", c_ubyte),
-                ("RemoteFlag", c_ubyte),
-                ("ExternFlag", c_ubyte),
-                ("DataLen", c_ubyte),
-                ("Data", c_ubyte*8),
-                ("Reserved", c_ubyte*3)
-                ] 
+    累积待发送报文，flush时一次性提交给总线的send_batch；
+    设备未接受的剩余报文重新排到队首，等待 retry_backoff × 重试次数 让发送FIFO腾出空间后再提交，
+    最多重试max_retries次后丢弃。
+    """
+    def __init__(self, bus, max_retries=3, max_batch=TX_BATCH_SIZE, retry_backoff=TX_RETRY_BACKOFF):
+        self.bus = bus
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_batch = max_batch
+        self._pending = deque()  # 元素为 [can_id, data, 已重试次数]
+        self._lock = threading.Lock()
+        self.sent_total = 0
+        self.retried_total = 0
+        self.dropped_total = 0
 
-class VCI_CAN_OBJ_ARRAY(Structure):
-    _fields_ = [('SIZE', ctypes.c_uint16), ('STRUCT_ARRAY', ctypes.POINTER(VCI_CAN_OBJ))]
+    def put(self, can_id, data):
+        with self._lock:
+            self._pending.append([can_id, bytes(data), 0])
 
-    def __init__(self, num_of_structs):
-        self.STRUCT_ARRAY = ctypes.cast((VCI_CAN_OBJ * num_of_structs)(), ctypes.POINTER(VCI_CAN_OBJ))
-        self.SIZE = num_of_structs
-        self.ADDR = self.STRUCT_ARRAY[0]
+    def extend(self, frames):
+        with self._lock:
+            self._pending.extend([can_id, bytes(data), 0] for can_id, data in frames)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def _submit(self, frames):
+        """提交一批报文，返回被接受的帧数；总线不支持批量时逐帧发送"""
+        send_batch = getattr(self.bus, 'send_batch', None)
+        if send_batch is not None:
+            return send_batch(frames)
+        accepted = 0
+        for can_id, data in frames:
+            try:
+                self.bus.send(can_id, data)
+            except Exception:
+                break
+            accepted += 1
+        return accepted
+
+    def flush(self):
+        """发送队列中的全部报文，返回 (已发送列表, 丢弃列表)，元素为(can_id, data)"""
+        sent, dropped = [], []
+        with self._lock:
+            while self._pending:
+                batch = [self._pending.popleft()
+                         for _ in range(min(self.max_batch, len(self._pending)))]
+                try:
+                    accepted = self._submit([(e[0], e[1]) for e in batch])
+                except Exception:
+                    accepted = 0
+                sent.extend((e[0], e[1]) for e in batch[:accepted])
+
+                # 未被接受的部分按原顺序放回队首，超过重试次数则丢弃
+                requeue = []
+                for entry in batch[accepted:]:
+                    entry[2] += 1
+                    if entry[2] > self.max_retries:
+                        dropped.append((entry[0], entry[1]))
+                    else:
+                        requeue.append(entry)
+                self.retried_total += len(requeue)
+                self._pending.extendleft(reversed(requeue))
+                if requeue and self.retry_backoff:
+                    # 设备发送FIFO已满，立即重提交只会在几微秒内耗尽重试次数
+                    time.sleep(self.retry_backoff * requeue[0][2])
+
+        self.sent_total += len(sent)
+        self.dropped_total += len(dropped)
+        return sent, dropped
+
+
+class LogRecord(namedtuple('LogRecord', ['timestamp', 'message', 'color'])):
+    """一条通信日志记录"""
+    __slots__ = ()
+
+    def format(self):
+        return f"[{self.timestamp}] {self.message}\n"
 
-class CANalystCANBus:
-    """创芯科技CAN总线类"""
-    def __init__(self, device_type=VCI_USBCAN2, device_index=0, can_index=0):
-        self.device_type = device_type
-        self.device_index = device_index
-        self.can_index = can_index
-        self.can_dll = None
-        self.is_connected = False
-        
-    def connect(self, baudrate=500000):
-        """连接CAN设备"""
-        try:
-            # 加载DLL
-            self.can_dll = windll.LoadLibrary('./ControlCAN.dll')
-            
-            # 打开设备
-            ret = self.can_dll.VCI_OpenDevice(self.device_type, self.device_index, 0)
-            if ret != STATUS_OK:
-                raise Exception("打开设备失败")
-                
-            # 设置波特率
-            timing0, timing1 = self.get_timing(baudrate)
-            
-            # 初始化CAN
-            vci_initconfig = VCI_INIT_CONFIG(0x80000008, 0xFFFFFFFF, 0,
-                                           0, timing0, timing1, 0)
-            ret = self.can_dll.VCI_InitCAN(self.device_type, self.device_index, 
-                                          self.can_index, byref(vci_initconfig))
-            if ret != STATUS_OK:
-                raise Exception("初始化CAN失败")
-                
-            # 启动CAN
-            ret = self.can_dll.VCI_StartCAN(self.device_type, self.device_index, self.can_index)
-            if ret != STATUS_OK:
-                raise Exception("启动CAN失败")
-                
-            self.is_connected = True
-            return True
-            
-        except Exception as e:
-            raise Exception(f"连接CAN设备失败: {str(e)}")
-            
-    def get_timing(self, baudrate):
-        """根据波特率获取定时参数"""
-        timing_map = {
-            250000: (0x03, 0x1C),  # 250kbps
-            500000: (0x00, 0x1C),  # 500kbps
-        }
-        return timing_map.get(baudrate, (0x00, 0x1C))
-        
-    def send(self, can_id, data):
-        """发送CAN报文"""
-        if not self.is_connected:
-            raise Exception("CAN设备未连接")
-            
-        # 创建数据数组
-        ubyte_array = c_ubyte * 8
-        can_data = ubyte_array(*data[:8])
-        
-        # 创建CAN对象
-        ubyte_3array = c_ubyte * 3
-        reserved = ubyte_3array(0, 0, 0)
-        vci_can_obj = VCI_CAN_OBJ(can_id, 0, 0, 1, 0, 0, len(data), can_data, reserved)
-        
-        # 发送数据
-        ret = self.can_dll.VCI_Transmit(self.device_type, self.device_index, 
-                                       self.can_index, byref(vci_can_obj), 1)
-        if ret != STATUS_OK:
-            raise Exception("发送CAN报文失败")
-            
-    def receive(self, timeout=100):
-        """接收CAN报文"""
-        if not self.is_connected:
-            return None
-            
-        try:
-            # 创建接收缓冲区
-            rx_vci_can_obj = VCI_CAN_OBJ_ARRAY(2500)
-            
-            # 接收数据
-            ret = self.can_dll.VCI_Receive(self.device_type, self.device_index, 
-                                          self.can_index, byref(rx_vci_can_obj.ADDR), 2500, timeout)
-            
-            if ret > 0:
-                messages = []
-                for i in range(ret):
-                    msg = rx_vci_can_obj.STRUCT_ARRAY[i]
-                    data = list(msg.Data[:msg.DataLen])
-                    messages.append({
-                        'id': msg.ID,
-                        'data': data,
-                        'length': msg.DataLen,
-                        'timestamp': msg.TimeStamp
-                    })
-                return messages
-            elif ret == 0:
-                # 超时，没有接收到数据
-                return None
-            else:
-                # 接收错误
-                print(f"VCI_Receive返回错误: {ret}")
-                return None
-                
-        except Exception as e:
-            print(f"接收CAN报文错误: {str(e)}")
-            return None
-        
-    def disconnect(self):
-        """断开连接"""
-        if self.can_dll and self.is_connected:
-            self.can_dll.VCI_CloseDevice(self.device_type, self.device_index)
-            self.is_connected = False
 
 class CANHostComputer:
     def __init__(self, root):
@@ -194,9 +144,18 @@ class CANHostComputer:
         self.can_bus = None
         self.is_connected = False
         self.is_running = False
+        self.scheduler = None  # 周期发送调度器
         self.is_receiving = False  # 新增接收状态
         self.last_heartbeat_time = None
         self.heartbeat_monitor_thread = None
+        self.watchdog = None  # 周期报文超时监视
+        self.receive_engine = None  # 接收循环，提供轮询指标
+        self.change_detector = PayloadChangeDetector()  # 数据未变化的报文跳过解析和表格更新
+        self.decode_cache = DecodeCache()  # 重复出现的位域/字符串数据区直接取缓存的解码结果
+        self.flag_bits = {}  # (行CAN ID, 标志表) -> 上一帧的位域原始值，只用于记录标志变化，仅接收线程读写
+        self.identity_store = BatteryIdentityStore()  # 按电池重组的版本、MAC地址和模块ID
+        self.timestamp_service = TimestampService()  # 硬件时间戳换算到主机单调时钟
+        self.bus_health = None  # 总线错误/溢出统计
         
         # 统计变量
         self.sent_count = 0
@@ -207,12 +166,36 @@ class CANHostComputer:
         self.sent_305_count = 0
         self.sent_307_count = 0
         
+        # 工作线程只向界面队列追加条目，由GUI线程定时批量刷新
+        self.gui_thread = threading.current_thread()
+        self.ui_queue = deque()
+        self.ui_queue_limit = UI_QUEUE_LIMIT
+        self.ui_refresh_hz = UI_REFRESH_HZ
+        self.ui_dropped_count = 0
+        # 表格单元按 (CAN ID, 参数) 合并为最新值，不进入有上限的队列，也就不会被丢弃；
+        # 数据未变化的报文不再重写表格，丢掉的单元会一直停留在旧值
+        self.ui_cells = {}
+        self.ui_cells_lock = threading.Lock()
+        
+        # 固定ID报文的专用处理函数，其余报文走通用解析
+        self.message_handlers = {
+            0x351: self.parse_heartbeat_message,
+            0x355: self.parse_bms_status_message,
+            0x356: self.parse_battery_info_message,
+            0x35A: self.parse_error_message,
+        }
+        for family in IDENTITY_FAMILIES:
+            self.message_handlers[family] = self.parse_identity_message
+        
         # 语言设置
         self.lang = 'zh' # 默认中文
         self.lang_var = tk.StringVar(value=self.lang)
         
         # 创建界面
         self.create_widgets()
+        
+        # 启动界面定时刷新
+        self.root.after(self.ui_refresh_interval_ms(), self.refresh_ui)
     def set_window_icon(self):
         """设置窗口图标"""
         try:
@@ -248,6 +231,13 @@ class CANHostComputer:
         row1 = ttk.Frame(connection_frame)
         row1.pack(fill="x", pady=2)
         
+        # 总线后端：Windows上为CANalyst，Linux上可选SocketCAN、进程内virtual总线或模拟器
+        ttk.Label(row1, text="后端:").pack(side="left", padx=5)
+        backends = [name for name in available_backends() if name != 'replay']
+        self.backend_var = tk.StringVar(value=DEFAULT_BACKEND if DEFAULT_BACKEND in backends else backends[0])
+        ttk.Combobox(row1, textvariable=self.backend_var, values=backends,
+                     width=10, state="readonly").pack(side="left", padx=5)
+        
         ttk.Label(row1, text="设备类型:").pack(side="left", padx=5)
         self.device_type_var = tk.StringVar(value="VCI_USBCAN2")
         device_type_combo = ttk.Combobox(row1, textvariable=self.device_type_var, 
@@ -257,7 +247,7 @@ class CANHostComputer:
         ttk.Label(row1, text="设备索引:").pack(side="left", padx=5)
         self.device_index_var = tk.StringVar(value="0")
         device_index_combo = ttk.Combobox(row1, textvariable=self.device_index_var, 
-                                        values=["0", "1"], width=5)
+                                        values=["0", "1", "0,1", "0,1,2,3"], width=8)
         device_index_combo.pack(side="left", padx=5)
         
         ttk.Label(row1, text="CAN通道:").pack(side="left", padx=5)
@@ -266,6 +256,11 @@ class CANHostComputer:
                                       values=["0", "1"], width=5)
         can_index_combo.pack(side="left", padx=5)
         
+        # 同时打开设备的两个通道，按硬件时间戳合并接收
+        self.dual_channel_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(row1, text="双通道",
+                        variable=self.dual_channel_var).pack(side="left", padx=5)
+        
         # 第二行：波特率设置
         row2 = ttk.Frame(connection_frame)
         row2.pack(fill="x", pady=2)
@@ -283,6 +278,11 @@ class CANHostComputer:
         self.disconnect_btn = ttk.Button(row2, text="断开", command=self.disconnect_can, state="disabled")
         self.disconnect_btn.pack(side="left", padx=5)
         
+        # 接收过滤：只接收协议中定义的报文，连接时生效
+        self.protocol_filter_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(row2, text="仅接收协议报文",
+                        variable=self.protocol_filter_var).pack(side="left", padx=10)
+        
         # 控制框架
         self.control_frame = ttk.LabelFrame(main_frame, text="控制", padding="10")
         control_frame = self.control_frame
@@ -346,6 +346,32 @@ class CANHostComputer:
         self.heartbeat_status_label = ttk.Label(stats_inner, textvariable=self.heartbeat_status_var)
         self.heartbeat_status_label.grid(row=0, column=5, padx=5)
         
+        # 界面队列丢弃统计
+        ttk.Label(stats_inner, text="丢弃:").grid(row=0, column=6, sticky="w", padx=5)
+        self.dropped_count_var = tk.StringVar(value="0")
+        ttk.Label(stats_inner, textvariable=self.dropped_count_var).grid(row=0, column=7, padx=5)
+        
+        # 接收循环指标
+        ttk.Label(stats_inner, text="接收轮询:").grid(row=0, column=8, sticky="w", padx=5)
+        self.rx_loop_stats_var = tk.StringVar(value="")
+        ttk.Label(stats_inner, textvariable=self.rx_loop_stats_var).grid(row=0, column=9, padx=5)
+        
+        # 总线健康：错误计数、溢出、总线关闭与主机侧丢弃
+        ttk.Label(stats_inner, text="总线状态:").grid(row=1, column=0, sticky="w", padx=5)
+        self.bus_health_var = tk.StringVar(value="")
+        ttk.Label(stats_inner, textvariable=self.bus_health_var).grid(row=1, column=1, columnspan=7,
+                                                                      sticky="w", padx=5)
+        ttk.Button(stats_inner, text="导出总线状态",
+                   command=self.export_bus_health).grid(row=1, column=8, columnspan=2, padx=5)
+        
+        # 电池身份信息：按需刷新与导出；协议未定义请求报文时电池只在启动时发送，刷新按钮不可用
+        self.refresh_identity_btn = ttk.Button(
+            stats_inner, text="刷新身份信息", command=self.request_identity,
+            state="normal" if IDENTITY_REQUEST_ID is not None else "disabled")
+        self.refresh_identity_btn.grid(row=1, column=10, padx=5)
+        ttk.Button(stats_inner, text="导出身份信息",
+                   command=self.export_identity).grid(row=1, column=11, padx=5)
+        
         # 创建左右分栏布局
         content_frame = ttk.Frame(main_frame)
         content_frame.pack(fill="both", expand=True, pady=5)
@@ -393,15 +419,34 @@ class CANHostComputer:
                                              command=self.toggle_auto_save)
         self.auto_save_check.pack(side="left", padx=5)
         
+        # 原始报文二进制捕获
+        self.capture_var = tk.BooleanVar(value=False)
+        self.capture_check = ttk.Checkbutton(log_btn_frame, text="原始报文捕获",
+                                             variable=self.capture_var,
+                                             command=self.toggle_capture)
+        self.capture_check.pack(side="left", padx=5)
+        self.capture_writer = None
+        
+        # 日志写入线程统计
+        self.log_writer_stats_var = tk.StringVar(value="")
+        ttk.Label(log_btn_frame, textvariable=self.log_writer_stats_var).pack(side="left", padx=5)
+        
         # 日志文本框
         self.log_text = scrolledtext.ScrolledText(log_frame, height=15)
         self.log_text.pack(fill="both", expand=True)
         
-        # 配置文本标签颜色
+        # 配置文本标签颜色；其他颜色的标签在第一次使用时创建
         self.log_text.tag_configure("heartbeat_red", foreground="red")
+        self.log_color_tags = {"black": ()}
+        
+        # 日志记录保存在有上限的环形缓冲区中，文本框只显示最近的LOG_VIEW_LINES行
+        self.log_records = deque(maxlen=LOG_BUFFER_SIZE)
+        self.log_view_limit = LOG_VIEW_LINES
+        self.log_view_line_count = 0
+        self.log_line_count = 0
         
         # 初始化日志文件相关变量
-        self.log_file = None
+        self.log_writer = None
         self.log_filename = None
         
         # 程序启动时自动开始保存日志
@@ -431,15 +476,16 @@ class CANHostComputer:
                 return
 
             self.log_filename = filename
-            self.log_file = open(self.log_filename, 'w', encoding='utf-8')
+            # 由后台线程批量写盘，避免每行flush
+            self.log_writer = AsyncLogWriter(self.log_filename)
 
             # 写入日志文件头部信息
             header = f"CAN协议上位机日志文件\n"
             header += f"创建时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
             header += f"设备类型: 创芯科技CANalyst-II\n"
             header += "=" * 50 + "\n\n"
-            self.log_file.write(header)
-            self.log_file.flush()
+            self.log_writer.write(header)
+            self.log_writer.flush()
 
             self.log_message(f"自动保存日志已开启，日志文件: {self.log_filename}")
 
@@ -449,93 +495,289 @@ class CANHostComputer:
     
     def stop_auto_save(self):
         """停止自动保存日志"""
-        if self.log_file:
+        if self.log_writer:
+            log_writer = self.log_writer
             try:
                 # 写入日志文件尾部信息
                 footer = f"\n" + "=" * 50 + "\n"
                 footer += f"日志结束时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
                 footer += f"总日志条数: {self.get_log_line_count()}\n"
                 
-                self.log_file.write(footer)
-                self.log_file.close()
+                log_writer.write(footer)
+                log_writer.close()
+                # 写完尾部并关闭后再清除，期间其他线程的日志仍写入文件
+                self.log_writer = None
+                if log_writer.error:
+                    raise log_writer.error
+                if log_writer.dropped:
+                    self.log_message(f"日志写入队列已满，丢弃 {log_writer.dropped} 条未写入文件")
                 
                 self.log_message(f"自动保存日志已停止，日志文件: {self.log_filename}")
                 
             except Exception as e:
+                self.log_writer = None
                 self.log_message(f"关闭日志文件时出错: {str(e)}")
             
-            self.log_file = None
             self.log_filename = None
+            self.log_writer_stats_var.set("")
+    
+    def toggle_capture(self):
+        """切换原始报文捕获"""
+        if self.capture_var.get():
+            self.start_capture()
+        else:
+            self.stop_capture()
+    
+    def start_capture(self):
+        """开始把接收到的原始报文写入二进制捕获文件"""
+        filename = filedialog.asksaveasfilename(
+            title="选择捕获文件保存路径",
+            defaultextension=".cancap",
+            filetypes=[("CAN捕获文件", "*.cancap"), ("所有文件", "*.*")],
+            initialfile=f"can_capture_{datetime.now().strftime('%Y%m%d_%H%M%S')}.cancap"
+        )
+        if not filename:
+            self.capture_var.set(False)
+            return
+        try:
+            self.capture_writer = CaptureWriter(filename)
+            self.log_message(f"原始报文捕获已开启，捕获文件: {filename}")
+        except Exception as e:
+            messagebox.showerror("错误", f"无法创建捕获文件: {str(e)}")
+            self.capture_var.set(False)
+    
+    def stop_capture(self):
+        """停止原始报文捕获"""
+        capture_writer = self.capture_writer
+        if capture_writer:
+            self.capture_writer = None
+            capture_writer.close()
+            self.log_message(f"原始报文捕获已停止，共 {capture_writer.frames_written} 帧: {capture_writer.filename}")
+    
+    def receive_messages(self, timeout, max_frames=RX_BUFFER_SIZE):
+        """从总线接收一批报文，开启捕获时同时写入捕获文件
+
+        每帧带上主机单调时钟下的时间戳 frame.time：有硬件时间戳的总线按设备时钟映射换算，
+        其余总线使用读取时刻
+        """
+        capture_writer = self.capture_writer
+        receive_batch = getattr(self.can_bus, 'receive_batch', None)
+        if receive_batch is not None:
+            batch = receive_batch(timeout=timeout, max_frames=max_frames)
+            if not batch:
+                return None
+            if capture_writer:
+                # 直接从接收缓冲区写入
+                capture_writer.write_batch(batch)
+            messages = batch.to_frames()
+        else:
+            messages = self.can_bus.receive(timeout=timeout)
+            if messages and capture_writer:
+                host_time = time.time()
+                for msg in messages:
+                    capture_writer.write_frame(msg.id, msg.data, int(msg.timestamp) & 0xFFFFFFFF,
+                                               host_time=host_time, channel=msg.channel or 0,
+                                               device=msg.device or 0)
+        if messages:
+            self.timestamp_service.stamp(messages, time.monotonic(), device=getattr(self.can_bus, 'device_index', 0),
+                                         hardware=getattr(self.can_bus, 'hardware_timestamps', False))
+        return messages
+    
+    def flush_log_file(self):
+        """请求日志文件立即写盘（报警、心跳丢失时调用）"""
+        log_writer = self.log_writer
+        if log_writer:
+            log_writer.flush()
     
     def get_log_line_count(self):
         """获取日志行数"""
-        try:
-            content = self.log_text.get(1.0, tk.END)
-            return len(content.split('\n')) - 1  # 减去最后一行空行
-        except:
-            return 0
+        return self.log_line_count
     
     def log_message(self, message, color="black"):
-        """添加日志消息"""
+        """添加日志消息（可在任意线程调用，非GUI线程的消息经界面队列批量显示）"""
         timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        
-        # 构建完整的日志消息
-        log_entry = f"[{timestamp}] {message}\n"
+        record = LogRecord(timestamp, message, color)
+        self.log_records.append(record)
+        self.log_line_count += 1
         
         # 插入到界面文本框
-        self.log_text.insert(tk.END, log_entry)
-        
-        # 检查是否包含"心跳状态"并设置颜色
-        if "心跳状态" in message:
-            # 获取刚插入的行的起始和结束位置
-            last_line_start = self.log_text.index("end-2l linestart")
-            last_line_end = self.log_text.index("end-1c")
-            
-            # 为整行设置红色标签
-            self.log_text.tag_add("heartbeat_red", last_line_start, last_line_end)
+        if self.is_gui_thread():
+            self.append_log_records([record])
+        else:
+            self.post_ui(('log', record))
         
+        # 如果开启了自动保存，交给写入线程批量写盘
+        log_writer = self.log_writer
+        if log_writer:
+            log_writer.write(record.format())
+    
+    def append_log_records(self, records):
+        """把一批日志记录一次性插入文本框，并裁掉超出显示窗口的旧行（GUI线程执行）"""
+        limit = self.log_view_limit
+        if len(records) > limit:
+            records = records[-limit:]
+        chunks = []
+        lines = 0
+        for record in records:
+            # 包含"心跳状态"的行整行标红，其余按记录的颜色显示
+            text = record.format()
+            lines += text.count("\n")
+            chunks.append(text)
+            chunks.append(("heartbeat_red",) if "心跳状态" in record.message else self.log_color_tag(record.color))
+        self.log_text.insert(tk.END, *chunks)
+        
+        self.log_view_line_count += lines
+        excess = self.log_view_line_count - limit
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+            self.log_view_line_count = limit
         self.log_text.see(tk.END)
-        
-        # 如果开启了自动保存，同时写入文件
-        if self.auto_save_var.get() and self.log_file:
-            try:
-                self.log_file.write(log_entry)
-                self.log_file.flush()  # 立即写入文件，确保数据不丢失
-            except Exception as e:
-                # 如果写入文件失败，在界面上显示错误
-                error_msg = f"[{timestamp}] 写入日志文件失败: {str(e)}\n"
-                self.log_text.insert(tk.END, error_msg)
-                self.log_text.see(tk.END)
+    
+    def log_color_tag(self, color):
+        """返回日志颜色对应的文本标签（GUI线程执行）"""
+        tags = self.log_color_tags.get(color)
+        if tags is None:
+            tag = f"log_{color}"
+            self.log_text.tag_configure(tag, foreground=color)
+            tags = self.log_color_tags[color] = (tag,)
+        return tags
+    
+    # ---------- 工作线程与界面之间的队列 ----------
+    def is_gui_thread(self):
+        return threading.current_thread() is self.gui_thread
+    
+    def post_ui(self, item):
+        """工作线程向界面队列追加一条更新
+
+        队列满时只丢弃日志条目并计数；函数调用（心跳超时/恢复等）和颜色等控制条目总是入队。
+        表格单元不经过此队列，见 update_table_item。
+        """
+        if item[0] in UI_SHEDDABLE_KINDS and len(self.ui_queue) >= self.ui_queue_limit:
+            self.ui_dropped_count += 1
+            return False
+        self.ui_queue.append(item)
+        return True
+    
+    def post_ui_call(self, func, *args):
+        """在GUI线程中执行func；从工作线程调用时排队到下一次界面刷新"""
+        if self.is_gui_thread():
+            func(*args)
+        else:
+            self.post_ui(('call', func, args))
+    
+    def ui_refresh_interval_ms(self):
+        return max(10, int(1000 / self.ui_refresh_hz))
+    
+    def refresh_ui(self):
+        """定时取空界面队列，每个表格单元只应用最新值"""
+        try:
+            self.drain_ui_queue()
+        except Exception as e:
+            print(f"界面刷新错误: {e}")
+        finally:
+            self.root.after(self.ui_refresh_interval_ms(), self.refresh_ui)
+    
+    def drain_ui_queue(self):
+        """取出当前队列中的全部条目并合并后应用到界面"""
+        with self.ui_cells_lock:
+            cells, self.ui_cells = self.ui_cells, {}
+        send_cells = {}
+        colors = {}
+        calls = {}
+        log_records = []
+        queue = self.ui_queue
+        for _ in range(len(queue)):
+            item = queue.popleft()
+            kind = item[0]
+            if kind == 'log':
+                log_records.append(item[1])
+            elif kind == 'send_cell':
+                send_cells[item[1][0]] = item[1]
+            elif kind == 'color':
+                colors[(item[1], item[2])] = item[3]
+            elif kind == 'call':
+                # 同一函数只执行最后一次
+                calls.pop(item[1], None)
+                calls[item[1]] = item[2]
+        
+        for values in cells.values():
+            self.apply_table_item(*values)
+        for values in send_cells.values():
+            self.apply_send_table_item(*values)
+        for func, args in calls.items():
+            func(*args)
+        for (can_id, parameter), color in colors.items():
+            self.apply_table_item_color(can_id, parameter, color)
+        if log_records:
+            self.append_log_records(log_records)
+        
+        # 日志写入线程的队列深度、写入量和写盘错误
+        log_writer = self.log_writer
+        if log_writer:
+            if log_writer.error:
+                error = log_writer.error
+                log_writer.error = None
+                self.append_log_records([LogRecord(datetime.now().strftime("%H:%M:%S.%f")[:-3],
+                                                   f"写入日志文件失败: {str(error)}", "red")])
+            stats = log_writer.stats()
+            text = LANGUAGES[self.lang]['log_writer_stats'].format(
+                depth=stats['queue_depth'], kb=stats['bytes_written'] / 1024, dropped=stats['dropped'])
+            if self.log_writer_stats_var.get() != text:
+                self.log_writer_stats_var.set(text)
+        
+        # 接收循环的轮询次数、每次帧数和空轮询
+        receive_engine = self.receive_engine
+        if receive_engine:
+            metrics = receive_engine.metrics
+            text = LANGUAGES[self.lang]['rx_loop_stats'].format(
+                polls=metrics['polls_per_sec'], frames=metrics['frames_per_poll'],
+                empty=metrics['empty_polls'], repeat=self.change_detector.hit_rate)
+            if self.rx_loop_stats_var.get() != text:
+                self.rx_loop_stats_var.set(text)
+        
+        # 总线健康汇总
+        bus_health = self.bus_health
+        if bus_health:
+            summary = bus_health.summary()
+            text = LANGUAGES[self.lang]['bus_health_stats'].format(**summary)
+            if self.bus_health_var.get() != text:
+                self.bus_health_var.set(text)
+        
+        # 计数器只在变化时更新
+        for var, value in ((self.sent_count_var, self.sent_count),
+                           (self.received_count_var, self.received_count),
+                           (self.dropped_count_var, self.ui_dropped_count)):
+            text = str(value)
+            if var.get() != text:
+                var.set(text)
     
     def clear_log(self):
         """清空日志"""
         self.log_text.delete(1.0, tk.END)
+        self.log_view_line_count = 0
+        self.log_line_count = 0
+        self.log_records.clear()
         
         # 如果开启了自动保存，在日志文件中记录清空操作
-        if self.auto_save_var.get() and self.log_file:
-            try:
-                timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                clear_msg = f"[{timestamp}] 用户手动清空日志\n"
-                self.log_file.write(clear_msg)
-                self.log_file.flush()
-            except Exception as e:
-                pass  # 忽略清空时的文件写入错误
+        if self.log_writer:
+            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+            self.log_writer.write(f"[{timestamp}] 用户手动清空日志\n")
     
     def save_log(self):
         """手动保存日志到文件（保留原有功能作为备用）"""
         try:
             filename = f"can_log_manual_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
             with open(filename, 'w', encoding='utf-8') as f:
-                f.write(self.log_text.get(1.0, tk.END))
+                f.writelines(record.format() for record in list(self.log_records))
             messagebox.showinfo("保存成功", f"日志已保存到: {filename}")
         except Exception as e:
             messagebox.showerror("保存失败", f"无法保存日志: {str(e)}")
     
     def __del__(self):
         """析构函数，确保程序退出时关闭日志文件"""
-        if hasattr(self, 'log_file') and self.log_file:
+        if getattr(self, 'log_writer', None):
             try:
-                self.log_file.close()
+                self.log_writer.close()
             except:
                 pass
         
@@ -543,16 +785,42 @@ class CANHostComputer:
         """连接CAN总线"""
         try:
             device_type = VCI_USBCAN2
-            device_index = int(self.device_index_var.get())
+            # 设备索引可填多个（如 "0,1,2,3"），多设备时合并为一条时间线
+            device_indexes = [int(text) for text in self.device_index_var.get().replace('，', ',').split(',')
+                              if text.strip()]
+            device_index = device_indexes[0]
             can_index = int(self.can_index_var.get())
             baudrate = int(self.baudrate_var.get())
             
+            backend = self.backend_var.get()
+            
             self.log_message(f"正在连接CAN设备...")
-            self.log_message(f"设备类型: VCI_USBCAN2, 设备索引: {device_index}, CAN通道: {can_index}, 波特率: {baudrate}")
+            if backend == 'canalyst':
+                self.log_message(f"设备类型: VCI_USBCAN2, 设备索引: {','.join(map(str, device_indexes))}, CAN通道: {can_index}, 波特率: {baudrate}")
+            else:
+                self.log_message(f"总线后端: {backend}, CAN通道: {can_index}, 波特率: {baudrate}")
             
-            # 创建CAN总线对象
-            self.can_bus = CANalystCANBus(device_type, device_index, can_index)
-            self.can_bus.connect(baudrate)
+            # 创建CAN总线对象，新连接重新估计设备时钟
+            self.timestamp_service.reset()
+            accept_ids = protocol_receive_ids() if self.protocol_filter_var.get() else None
+            if backend == 'canalyst' and (self.dual_channel_var.get() or len(device_indexes) > 1):
+                channels = [0, 1] if self.dual_channel_var.get() else [can_index]
+                self.can_bus = self.connect_sources(device_type, device_indexes, channels, baudrate, accept_ids)
+                channel_bus = self.can_bus.readers[0].bus
+            else:
+                self.can_bus = create_bus(backend, device_index=device_index, channel=can_index,
+                                          accept_ids=accept_ids)
+                self.can_bus.connect(baudrate)
+                channel_bus = self.can_bus
+            self.start_bus_health()
+            acceptance = getattr(channel_bus, 'acceptance', None)
+            if accept_ids and acceptance is not None:
+                self.log_message(f"接收过滤: 验收码 0x{acceptance.acc_code:08X}, 屏蔽码 0x{acceptance.acc_mask:08X}, "
+                                 f"{'单' if acceptance.mode else '双'}滤波, 硬件放行 {acceptance.accepted} 个ID, "
+                                 f"协议报文 {len(accept_ids)} 个ID")
+            elif accept_ids and getattr(channel_bus, 'accept_ids', None):
+                stage = "软件位图" if getattr(channel_bus, 'software_filter', None) is not None else "内核过滤器"
+                self.log_message(f"接收过滤: {stage} {len(accept_ids)} 个ID")
             
             self.is_connected = True
             
@@ -583,6 +851,126 @@ class CANHostComputer:
             messagebox.showerror("连接错误", f"无法连接CAN设备: {str(e)}")
             self.log_message(f"连接失败: {str(e)}")
     
+    def connect_sources(self, device_type, device_indexes, channels, baudrate, accept_ids=None):
+        """连接多个设备/通道，返回合并接收的总线（发送走第一个设备的第一个通道）
+
+        每个设备由其第一个通道打开，其余通道共用该设备；任一通道连接失败时断开已连接的通道
+        """
+        sources = []
+        try:
+            for device_index in device_indexes:
+                for i, channel in enumerate(channels):
+                    bus = CANalystCANBus(device_type, device_index, channel, accept_ids=accept_ids)
+                    bus.connect(baudrate, open_device=(i == 0))
+                    sources.append((device_index, channel, bus))
+        except Exception:
+            for _, _, bus in reversed(sources):
+                bus.disconnect()
+            raise
+        bus = MultiChannelBus.from_sources(sources)
+        bus.connect()
+        tags = ", ".join(f"设备{device}/通道{channel}" for device, channel, _ in sources)
+        self.log_message(f"多通道接收: {tags}，按对齐后的硬件时间戳合并")
+        return bus
+    
+    def host_drop_count(self):
+        """主机侧丢弃的帧数：界面队列丢弃加多通道合并队列溢出"""
+        drops = self.ui_dropped_count
+        if isinstance(self.can_bus, MultiChannelBus):
+            drops += sum(reader.dropped for reader in self.can_bus.readers)
+        return drops
+    
+    def start_bus_health(self):
+        """开始低频轮询各通道的错误信息和控制器状态"""
+        if isinstance(self.can_bus, MultiChannelBus):
+            sources = [(reader.tag, reader.bus) for reader in self.can_bus.readers]
+        else:
+            sources = [((getattr(self.can_bus, 'device_index', 0), getattr(self.can_bus, 'can_index', 0)),
+                        self.can_bus)]
+        self.bus_health = BusHealthMonitor(sources, host_drops=self.host_drop_count)
+        self.bus_health.start()
+    
+    def stop_bus_health(self):
+        """停止总线状态轮询，并把汇总写入日志"""
+        bus_health = self.bus_health
+        if bus_health:
+            bus_health.stop()
+            summary = bus_health.summary()
+            self.log_message(f"总线状态统计: 溢出 {summary['overruns']} 次, 总线关闭 {summary['bus_off_events']} 次, "
+                             f"接收错误 {summary['receive_errors']} 次, 主机侧丢弃 {summary['host_drops']} 帧")
+    
+    def export_bus_health(self):
+        """把总线状态历史导出为CSV"""
+        bus_health = self.bus_health
+        if not bus_health or not bus_health.history:
+            messagebox.showinfo("提示", "暂无总线状态数据")
+            return
+        filename = filedialog.asksaveasfilename(
+            title="导出总线状态",
+            defaultextension=".csv",
+            filetypes=[("CSV文件", "*.csv"), ("所有文件", "*.*")],
+            initialfile=f"bus_health_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        )
+        if not filename:
+            return
+        try:
+            rows = bus_health.export_csv(filename)
+            self.log_message(f"总线状态已导出 {rows} 条: {filename}")
+        except Exception as e:
+            messagebox.showerror("错误", f"导出总线状态失败: {str(e)}")
+    
+    def request_identity(self):
+        """按需刷新身份信息：发送请求报文，清空缓存的身份报文并开始计时"""
+        if IDENTITY_REQUEST_ID is None:
+            # 身份报文只在电池启动和收到请求时发送，没有请求报文时刷新只会等到超时
+            self.log_message("协议未定义身份信息请求报文（IDENTITY_REQUEST_ID未设置），"
+                             "身份信息在电池启动时发送，无法按需刷新")
+            return
+        if not self.is_connected or not self.can_bus:
+            messagebox.showwarning("警告", "请先连接CAN设备")
+            return
+        addresses = self.identity_store.request(time.monotonic())
+        # 身份报文内容通常不变，让变化检测放行每个身份ID的下一帧
+        for family in IDENTITY_FAMILIES:
+            for address in range(0x10):
+                self.change_detector.forget(family | address)
+        try:
+            self.can_bus.send(IDENTITY_REQUEST_ID, IDENTITY_REQUEST_DATA)
+        except Exception as e:
+            self.log_message(f"发送身份信息请求失败: {str(e)}")
+            return
+        self.log_message(f"发送: ID=0x{IDENTITY_REQUEST_ID:03X}, 数据: {IDENTITY_REQUEST_DATA.hex()}")
+        self.log_message(f"刷新身份信息: 已知电池 {len(addresses)} 个，"
+                         f"等待身份报文（超时 {self.identity_store.timeout:g} 秒）")
+    
+    def export_identity(self):
+        """把缓存的电池身份信息导出为CSV"""
+        if not self.identity_store.identities():
+            messagebox.showinfo("提示", "暂无身份信息")
+            return
+        filename = filedialog.asksaveasfilename(
+            title="导出身份信息",
+            defaultextension=".csv",
+            filetypes=[("CSV文件", "*.csv"), ("所有文件", "*.*")],
+            initialfile=f"battery_identity_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        )
+        if not filename:
+            return
+        try:
+            rows = self.identity_store.export_csv(filename)
+            self.log_message(f"身份信息已导出 {rows} 条: {filename}")
+        except Exception as e:
+            messagebox.showerror("错误", f"导出身份信息失败: {str(e)}")
+    
+    def log_filter_stats(self):
+        """记录接收过滤各阶段的统计"""
+        filter_stats = getattr(self.can_bus, 'filter_stats', None)
+        if filter_stats is None or (self.can_bus.software_filter is None and self.can_bus.acceptance is ACCEPT_ALL):
+            return
+        stats = filter_stats()
+        self.log_message(f"接收过滤统计: 硬件放行 {stats['hw_passed']} 帧, 软件拒绝 {stats['sw_rejected']} 帧, "
+                         f"软件放行 {stats['sw_passed']} 帧（硬件拒绝的帧数设备不提供）")
+    
     def _initial_receive_test(self):
         """连接后立即测试接收"""
         try:
@@ -590,13 +978,13 @@ class CANHostComputer:
             start_time = time.time()
             received_count = 0
             
+            engine = ReceiveEngine(self.can_bus)
             while time.time() - start_time < 3:
-                messages = self.can_bus.receive(timeout=100)
+                messages = engine.poll()
                 if messages:
                     received_count += len(messages)
                     for msg in messages:
-                        self.log_message(f"初始测试接收: ID=0x{msg['id']:03X}, 数据: {bytes(msg['data']).hex()}")
-                time.sleep(0.1)
+                        self.log_message(f"初始测试接收: ID=0x{msg.id:03X}, 数据: {msg.hex}")
             
             if received_count > 0:
                 self.log_message(f"初始测试成功，接收到 {received_count} 个报文")
@@ -611,6 +999,8 @@ class CANHostComputer:
         if self.can_bus:
             self.stop_sending()
             self.stop_receiving()
+            self.log_filter_stats()
+            self.stop_bus_health()
             self.can_bus.disconnect()
             self.can_bus = None
             
@@ -658,15 +1048,25 @@ class CANHostComputer:
         self.update_send_data_table(0x305, lang['start_send_status'], 0, current_time)
         self.update_send_data_table(0x307, lang['start_send_status'], 0, current_time)
         
-        # 启动发送线程
-        self.send_thread = threading.Thread(target=self.send_messages, daemon=True)
-        self.send_thread.start()
+        # 启动周期发送调度器
+        self.scheduler = PeriodicScheduler(CANTxQueue(self.can_bus), on_sent=self.on_periodic_sent)
+        for can_id, producer, period, phase in PERIODIC_TX_MESSAGES:
+            self.scheduler.add(can_id, getattr(self, producer), period, phase)
+        self.scheduler.start()
         
         self.log_message("开始发送CAN报文")
     
     def stop_sending(self):
         """停止发送CAN报文"""
         self.is_running = False
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.drain_ui_queue()  # 先刷新调度线程已排队的更新，避免覆盖"已停止"状态
+            for can_id, stats in self.scheduler.stats().items():
+                self.log_message(f"周期报文0x{can_id:03X}: 发送{stats['sent']}次, 漏发{stats['missed']}次, "
+                                 f"平均延迟{stats['lateness_mean'] * 1000:.2f}ms, "
+                                 f"最大延迟{stats['lateness_max'] * 1000:.2f}ms, "
+                                 f"最大抖动{stats['jitter_max'] * 1000:.2f}ms")
         self.start_btn.config(state="normal")
         self.stop_btn.config(state="disabled")
         
@@ -678,43 +1078,32 @@ class CANHostComputer:
         
         self.log_message("停止发送CAN报文")
         
-    def send_messages(self):
-        """发送CAN报文的线程函数"""
-        while self.is_running and self.is_connected:
-            try:
-                # 发送ID为0x305的报文
-                msg_305_data = self.create_305_message()
-                self.can_bus.send(0x305, msg_305_data)
-                self.sent_count += 1
+    def on_periodic_sent(self, sent, dropped):
+        """调度器每发送一批报文后回调（调度线程）"""
+        if not (self.is_running and self.is_connected):
+            return
+        current_time = datetime.now().strftime("%H:%M:%S")
+        lang = LANGUAGES[self.lang]
+        stats = self.scheduler.stats() if self.scheduler is not None else {}
+        for can_id, data in sent:
+            self.sent_count += 1
+            if can_id == 0x305:
                 self.sent_305_count += 1
-                self.sent_count_var.set(str(self.sent_count))
-                
-                # 更新发送数据表格 - 保持"正在发送"状态
-                current_time = datetime.now().strftime("%H:%M:%S")
-                lang = LANGUAGES[self.lang]
-                self.update_send_data_table(0x305, lang['start_send_status'], self.sent_305_count, current_time)
-                
-                self.log_message(f"发送: ID=0x305, 数据: {msg_305_data.hex()}")
-                
-                # 发送ID为0x307的报文
-                msg_307_data = self.create_307_message()
-                self.can_bus.send(0x307, msg_307_data)
-                self.sent_count += 1
+                count = self.sent_305_count
+            elif can_id == 0x307:
                 self.sent_307_count += 1
-                self.sent_count_var.set(str(self.sent_count))
-                
-                # 更新发送数据表格 - 保持"正在发送"状态
-                current_time = datetime.now().strftime("%H:%M:%S")
-                lang = LANGUAGES[self.lang]
-                self.update_send_data_table(0x307, lang['start_send_status'], self.sent_307_count, current_time)
-                
-                self.log_message(f"发送: ID=0x307, 数据: {msg_307_data.hex()}")
-                
-                time.sleep(1)  # 每秒发送一次
-                
-            except Exception as e:
-                self.log_message(f"发送错误: {str(e)}")
-                break
+                count = self.sent_307_count
+            else:
+                count = stats.get(can_id, {}).get('sent', 0)
+            # 更新发送数据表格 - 保持"正在发送"状态，出现漏发时在状态列显示
+            missed = stats.get(can_id, {}).get('missed', 0)
+            self.update_send_data_table(can_id, lang['start_send_status'], count, current_time, missed)
+            self.log_message(f"发送: ID=0x{can_id:03X}, 数据: {data.hex()}")
+
+        if dropped:
+            self.log_message(f"发送错误: 发送CAN报文失败，{len(dropped)} 帧重试后仍未被接受")
+            self.is_running = False
+            self.scheduler.stop()
                 
     def create_305_message(self):
         """创建0x305报文数据 - Keepalive from inverter to BMS"""
@@ -740,8 +1129,8 @@ class CANHostComputer:
     def parse_heartbeat_message(self, msg):
         """解析0x351报文 - 充放电信息（用作心跳标志）"""
         try:
-            data = msg['data']
-            parsed_data = parse_351_message(data)
+            data = msg.data
+            parsed_data = self.decode_cache.parse(msg.id, data)
             
             if parsed_data:
                 # 更新表格
@@ -757,8 +1146,8 @@ class CANHostComputer:
     def parse_bms_status_message(self, msg):
         """解析BMS状态报文 (0x355)"""
         try:
-            data = msg['data']
-            parsed_data = parse_355_message(data)
+            data = msg.data
+            parsed_data = self.decode_cache.parse(msg.id, data)
             
             if parsed_data:
                 # 更新表格
@@ -774,8 +1163,8 @@ class CANHostComputer:
     def parse_battery_info_message(self, msg):
         """解析电池信息报文 (0x356)"""
         try:
-            data = msg['data']
-            parsed_data = parse_356_message(data)
+            data = msg.data
+            parsed_data = self.decode_cache.parse(msg.id, data)
             
             if parsed_data:
                 # 更新表格
@@ -791,34 +1180,70 @@ class CANHostComputer:
     def parse_error_message(self, msg):
         """解析错误报文 (0x35A)"""
         try:
-            data = msg['data']
-            parsed_data = parse_35A_message(data)
+            data = msg.data
+            parsed_data = self.decode_cache.parse(msg.id, data)
             
             if parsed_data:
                 # 更新表格
                 self.update_table_data(0x35A, parsed_data)
                 
                 # 记录警告信息
-                warnings = parsed_data['warnings']
-                active_warnings = [name for name, active in warnings.items() if active]
+                active_warnings = parsed_data['warnings'].active()
                 if active_warnings:
                     self.log_message(f"检测到警告: {', '.join(active_warnings)}")
                 else:
                     self.log_message("无警告信息")
+                
+                # 有报警或警告时立即写盘
+                if active_warnings or parsed_data['alarms'].any():
+                    self.flush_log_file()
             else:
                 self.log_message(f"0x35A报文数据长度不足: {len(data)} 字节")
                 
         except Exception as e:
             self.log_message(f"解析错误报文错误: {str(e)}")
     
+    def parse_identity_message(self, msg):
+        """解析身份报文 (0x45n-0x48n, 0x4An)：两帧版本字符串重组后按电池显示"""
+        try:
+            now = msg.time if msg.time is not None else time.monotonic()
+            identity = self.identity_store.observe(msg.id, msg.data, now)
+            if identity is None:
+                return
+            self.update_identity_rows(identity)
+            if identity.answered == now:
+                self.log_message(f"电池{identity.battery_address} 身份信息刷新完成，"
+                                 f"用时 {identity.response_time:.3f} 秒")
+            if identity.updated == now and identity.complete:
+                self.log_message(f"电池{identity.battery_address} 身份信息: 控制器版本 {identity.controller_version}, "
+                                 f"BMS版本 {identity.bms_version}, MAC {identity.esp32_mac_address}, "
+                                 f"模块ID {identity.module_id}")
+        except Exception as e:
+            self.log_message(f"解析身份报文 0x{msg.id:03X} 出错: {str(e)}")
+    
+    def update_identity_rows(self, identity):
+        """用缓存的身份信息填写该电池的表格行，尚未到齐的字段不写"""
+        lang = LANGUAGES[self.lang]
+        current_time = datetime.now().strftime("%H:%M:%S")
+        can_id_display = f"{lang['identity']}(电池{identity.battery_address})"
+        for label, key in lang['table_identity']:
+            if key == 'response_time':
+                if identity.response_time is not None:
+                    self.update_table_item(can_id_display, label, f"{identity.response_time:.3f}", 's',
+                                           lang['normal'], current_time)
+                continue
+            value = getattr(identity, key)
+            if value is not None:
+                self.update_table_item(can_id_display, label, str(value), '', lang['normal'], current_time)
+    
     def parse_new_message(self, msg):
         """解析新的CAN报文"""
-        msg_id = msg['id']
-        data = msg['data']
+        msg_id = msg.id
+        data = msg.data
         
         try:
-            # 使用通用解析函数
-            parsed_data = parse_can_message(msg_id, data)
+            # 使用通用解析函数（位域和字符串报文经解码缓存）
+            parsed_data = self.decode_cache.parse(msg_id, data)
             if parsed_data:
                 # 统一使用现有的update_table_data方法
                 self.update_table_data(msg_id, parsed_data)
@@ -831,79 +1256,96 @@ class CANHostComputer:
     def monitor_heartbeat(self):
         """监控心跳的线程函数"""
         self.log_message("心跳监控线程已启动")
-        heartbeat_timeout_reported = False  # 添加标志，避免重复报告超时
+        engine = ReceiveEngine(self.can_bus, read=self.receive_messages, max_frames=RX_BUFFER_SIZE)
+        self.receive_engine = engine
         
         while self.is_receiving and self.is_connected:
             try:
-                # 接收CAN报文
-                messages = self.can_bus.receive(timeout=50)
+                # 接收CAN报文（空闲时在接收循环中等待，不空转）
+                messages = engine.poll()
                 
                 if messages:
                     self.log_message(f"接收到 {len(messages)} 个报文")
                     for msg in messages:
                         self.received_count += 1
-                        self.received_count_var.set(str(self.received_count))
                         self.process_received_message(msg)
                         
                         # 检查心跳报文（0x351作为心跳标志）
-                        if msg['id'] == 0x351:
+                        if msg.id == 0x351:
                             self.last_heartbeat_time = time.time()
                             self.heartbeat_count += 1  # 增加心跳计数
-                            lang = LANGUAGES[self.lang]
-                            self.heartbeat_status_var.set(lang['normal'])
-                            self.heartbeat_status_label.config(foreground="black") # 恢复黑色
                             
-                            # 重置超时报告标志
-                            heartbeat_timeout_reported = False
+                            # 界面上的心跳状态在下一次刷新时更新
+                            self.post_ui_call(self.show_heartbeat_normal)
                             
-                            # 更新表格中的心跳状态
-                            current_time = datetime.now().strftime("%H:%M:%S")
-                            lang = LANGUAGES[self.lang]
-                            self.update_table_item('0x351', lang['table_351'][0][0], str(self.heartbeat_count), '', lang['normal'], current_time)
-                            self.set_table_item_color('0x351', lang['table_351'][0][0], 'black')
-                            
-                            self.log_message(f"收到心跳标志: ID=0x351, 数据: {bytes(msg['data']).hex()}")
+                            self.log_message(f"收到心跳标志: ID=0x351, 数据: {msg.hex}")
                             
             except Exception as e:
                 self.log_message(f"接收线程错误: {str(e)}")
                 
-            # 检查心跳超时（3秒未收到0x351）
-            if self.last_heartbeat_time and (time.time() - self.last_heartbeat_time) > 3:
-                if not heartbeat_timeout_reported:  # 只在第一次超时时报告
-                    self.root.after(0, self.handle_heartbeat_timeout)
-                    heartbeat_timeout_reported = True
+            # 检查各报文流超时（含0x351心跳）
+            watchdog = self.watchdog
+            if watchdog:
+                for event in watchdog.check():
+                    self.handle_watchdog_event(event)
+            
+            # 身份信息刷新请求超时
+            for address in self.identity_store.expired(time.monotonic()):
+                self.log_message(f"警告: 电池{address} 身份信息刷新超过{self.identity_store.timeout:g}秒未完成",
+                                 color="red")
+    
+    def create_watchdog(self):
+        """按规格中的发送周期创建报文超时监视，0x351使用心跳超时时间"""
+        watchdog = StreamWatchdog(MESSAGE_PERIODS)
+        watchdog.set_timeout(0x351, HEARTBEAT_TIMEOUT)
+        return watchdog
+    
+    def handle_watchdog_event(self, event):
+        """处理报文流超时/恢复事件（接收线程调用）"""
+        if event.family == 0x351:
+            # 心跳恢复由收到0x351时的正常流程显示
+            if event.kind == STREAM_STALE:
+                self.post_ui_call(self.handle_heartbeat_timeout)
+            return
+        if event.kind == STREAM_STALE:
+            self.log_message(f"警告: 电池{event.battery_address} 报文0x{event.family:03X} "
+                             f"超过{event.timeout:g}秒未更新", color="red")
+            self.flush_log_file()
+        else:
+            self.log_message(f"电池{event.battery_address} 报文0x{event.family:03X} 已恢复", color="green")
     
     def process_received_message(self, msg):
         """处理接收到的CAN报文"""
-        msg_id = msg['id']
-        
-        # 扩展支持的CAN ID列表
-        supported_ids = [0x351, 0x355, 0x356, 0x35A]
-        
-        # 添加新的0x2nn系列ID支持
-        for i in range(16):  # 支持电池地址0-15
-            supported_ids.extend([
-                0x200 + i, 0x210 + i, 0x220 + i, 0x230 + i, 0x240 + i, 0x250 + i, 0x260 + i,
-                0x400 + i, 0x410 + i, 0x420 + i, 0x430 + i, 0x440 + i, 0x450 + i, 0x460 + i,
-                0x470 + i, 0x480 + i, 0x490 + i, 0x4A0 + i
-            ])
-        
-        if msg_id in supported_ids:
-            self.log_message(f"解析报文: ID=0x{msg_id:03X}, 数据: {bytes(msg['data']).hex()}")
+        msg_id = msg.id
+        
+        # 通过预先构建的分发表直接定位报文系列，不支持的ID返回None
+        route = lookup_message_route(msg_id)
+        if route is not None:
+            # 数据与该ID上一帧相同时只记录到达时间和计数，跳过解析、日志和表格更新
+            if self.change_detector.observe(msg):
+                channel = msg.channel
+                prefix = f"CH{channel} " if channel is not None else ""
+                self.log_message(f"解析报文: {prefix}ID=0x{msg_id:03X}, 数据: {msg.hex}")
+                
+                # 根据协议解析具体内容，未单独处理的报文交给通用解析
+                handler = self.message_handlers.get(route.family, self.parse_new_message)
+                handler(msg)
             
-            # 根据协议解析具体内容
-            if msg_id == 0x351:
-                self.parse_heartbeat_message(msg)
-            elif msg_id == 0x355:
-                self.parse_bms_status_message(msg)
-            elif msg_id == 0x356:
-                self.parse_battery_info_message(msg)
-            elif msg_id == 0x35A:
-                self.parse_error_message(msg)
-            else:
-                # 处理新的CAN ID
-                self.parse_new_message(msg)
+            watchdog = self.watchdog
+            if watchdog:
+                watchdog.feed(route.family, route.battery_address, msg.time)
                 
+    def show_heartbeat_normal(self):
+        """显示心跳正常状态（GUI线程执行）"""
+        lang = LANGUAGES[self.lang]
+        self.heartbeat_status_var.set(lang['normal'])
+        self.heartbeat_status_label.config(foreground="black") # 恢复黑色
+        
+        # 更新表格中的心跳状态
+        current_time = datetime.now().strftime("%H:%M:%S")
+        self.update_table_item('0x351', lang['table_351'][0][0], str(self.heartbeat_count), '', lang['normal'], current_time)
+        self.set_table_item_color('0x351', lang['table_351'][0][0], 'black')
+    
     def handle_heartbeat_timeout(self):
         """处理心跳超时"""
         lang = LANGUAGES[self.lang]
@@ -916,7 +1358,8 @@ class CANHostComputer:
         # 设置表格中“停止”为红色
         self.set_table_item_color('0x351', lang['table_351'][0][0], 'red')
         # 日志记录
-        self.log_message("警告: BMS心跳终止，3秒未收到0x351报文", color="red")
+        self.log_message(f"警告: BMS心跳终止，{HEARTBEAT_TIMEOUT}秒未收到0x351报文", color="red")
+        self.flush_log_file()
 
     def test_receive(self):
         """手动测试接收功能"""
@@ -935,12 +1378,12 @@ class CANHostComputer:
         try:
             # 测试接收5秒
             start_time = time.time()
+            engine = ReceiveEngine(self.can_bus)
             while time.time() - start_time < 5:
-                messages = self.can_bus.receive(timeout=100)
+                messages = engine.poll()
                 if messages:
                     for msg in messages:
-                        self.log_message(f"测试接收: ID=0x{msg['id']:03X}, 数据: {bytes(msg['data']).hex()}")
-                time.sleep(0.1)
+                        self.log_message(f"测试接收: ID=0x{msg.id:03X}, 数据: {msg.hex}")
             
             self.log_message("接收测试完成")
             
@@ -959,6 +1402,7 @@ class CANHostComputer:
         try:
             # 这里可以添加更多的诊断代码
             self.log_message("设备连接正常")
+            self.log_filter_stats()
             self.log_message("建议检查：")
             self.log_message("1. CAN总线连接是否正确")
             self.log_message("2. 波特率是否匹配")
@@ -974,6 +1418,10 @@ class CANHostComputer:
             messagebox.showwarning("警告", "请先连接CAN设备")
             return
             
+        if isinstance(self.can_bus, MultiChannelBus):
+            self.log_message("多通道模式下各通道同时接收，无需切换")
+            return
+            
         current_channel = int(self.can_index_var.get())
         new_channel = 1 if current_channel == 0 else 0
         
@@ -1007,13 +1455,13 @@ class CANHostComputer:
             start_time = time.time()
             total_received = 0
             
+            engine = ReceiveEngine(self.can_bus, max_interval=RX_MIN_INTERVAL * 2)  # 更频繁的检查
             while time.time() - start_time < 10:
-                messages = self.can_bus.receive(timeout=50)
+                messages = engine.poll()
                 if messages:
                     total_received += len(messages)
                     for msg in messages:
-                        self.log_message(f"强制测试接收: ID=0x{msg['id']:03X}, 数据: {bytes(msg['data']).hex()}")
-                time.sleep(0.05)  # 更频繁的检查
+                        self.log_message(f"强制测试接收: ID=0x{msg.id:03X}, 数据: {msg.hex}")
             
             self.log_message(f"强制接收测试完成，总共接收: {total_received} 个报文")
             
@@ -1051,6 +1499,10 @@ class CANHostComputer:
         self.heartbeat_status_var.set(lang['waiting'])
         self.heartbeat_count = 0
         self.last_heartbeat_time = None
+        self.watchdog = self.create_watchdog()
+        self.change_detector.reset()
+        self.flag_bits = {}
+        self.identity_store.reset()
         
         # 重置表格中的心跳状态
         current_time = datetime.now().strftime("%H:%M:%S")
@@ -1067,6 +1519,8 @@ class CANHostComputer:
             return
         
         self.is_receiving = False
+        if self.receive_engine:
+            self.receive_engine.stop()
         # Wait for the thread to finish (optional, but good practice for clean shutdown)
         if self.receive_thread and self.receive_thread.is_alive():
             self.receive_thread.join(timeout=1) # Give it a second to finish
@@ -1076,6 +1530,12 @@ class CANHostComputer:
         self.heartbeat_status_var.set(lang['stop'])
         self.heartbeat_count = 0
         self.last_heartbeat_time = None
+        self.watchdog = None
+        self.receive_engine = None
+        self.rx_loop_stats_var.set("")
+        stats = self.decode_cache.stats()
+        self.log_message(f"解码缓存: 命中 {stats['hits']}, 未命中 {stats['misses']}, 淘汰 {stats['evictions']}, "
+                         f"命中率 {stats['hit_rate']:.0%}")
         
         # 重置表格中的心跳状态
         current_time = datetime.now().strftime("%H:%M:%S")
@@ -1129,8 +1589,16 @@ class CANHostComputer:
         for item in self.data_tree.get_children():
             self.data_tree.delete(item)
         
+        # 表格重建后每个ID的下一帧都要重新解析填表
+        self.change_detector.reset()
+        
+        # (CAN ID, 参数) -> 行ID 的索引，以及每行最近写入的值和颜色
+        self.table_index = {}
+        self.table_row_values = {}
+        self.table_row_colors = {}
+        
         # 0x351 - 心跳状态特殊处理
-        self.data_tree.insert('', 'end', values=('0x351', lang['table_351'][0][0], '0', '', lang['waiting'], '--'))
+        self.insert_table_row(('0x351', lang['table_351'][0][0], '0', '', lang['waiting'], '--'))
         
         # 0x351 - 其他参数
         for label, key in lang['table_351'][1:]:  # 跳过第一个心跳状态
@@ -1139,12 +1607,12 @@ class CANHostComputer:
                 unit = 'V'
             elif 'current' in key or '电流' in label:
                 unit = 'A'
-            self.data_tree.insert('', 'end', values=('0x351', label, '--', unit, lang['waiting'], '--'))
+            self.insert_table_row(('0x351', label, '--', unit, lang['waiting'], '--'))
         
         # 0x355
         for label, key in lang.get('table_355', []):
             unit = '%' if 'soc' in key.lower() or 'soh' in key.lower() else ''
-            self.data_tree.insert('', 'end', values=('0x355', label, '--', unit, lang['waiting'], '--'))
+            self.insert_table_row(('0x355', label, '--', unit, lang['waiting'], '--'))
         
         # 0x356
         for label, key in lang.get('table_356', []):
@@ -1155,15 +1623,19 @@ class CANHostComputer:
                 unit = 'A'
             elif 'temperature' in key or '温度' in label:
                 unit = '°C'
-            self.data_tree.insert('', 'end', values=('0x356', label, '--', unit, lang['waiting'], '--'))
+            self.insert_table_row(('0x356', label, '--', unit, lang['waiting'], '--'))
         
         # 0x35A - Alarm信息
         for label, key in lang['table_35A_alarm']:
-            self.data_tree.insert('', 'end', values=('0x35A', label, '--', '', lang['waiting'], '--'))
+            self.insert_table_row(('0x35A', label, '--', '', lang['waiting'], '--'))
 
         # 0x35A - Warning信息
         for label, key in lang['table_35A_warning']:
-            self.data_tree.insert('', 'end', values=('0x35A', label, '--', '', lang['waiting'], '--'))
+            self.insert_table_row(('0x35A', label, '--', '', lang['waiting'], '--'))
+        
+        # 身份信息只在变化时返回，表格重建后直接从缓存填写
+        for identity in self.identity_store.identities():
+            self.update_identity_rows(identity)
     
     def update_table_data(self, can_id, parsed_data):
         """更新表格数据"""
@@ -1228,12 +1700,8 @@ class CANHostComputer:
                                 f"{parsed_data.get('battery_temperature', 0):.1f}", '°C', lang['normal'], current_time)
 
         elif can_id == 0x35A:
-            alarms = parsed_data.get('alarms', {})
-            warnings = parsed_data.get('warnings', {})
-            for label, key in lang['table_35A_alarm']:
-                self.update_table_item('0x35A', label, int(alarms.get(key, False)), '', lang['normal'], current_time)
-            for label, key in lang['table_35A_warning']:
-                self.update_table_item('0x35A', label, int(warnings.get(key, False)), '', lang['normal'], current_time)
+            self.update_flag_rows('0x35A', lang['table_35A_alarm'], parsed_data.get('alarms', {}), current_time)
+            self.update_flag_rows('0x35A', lang['table_35A_warning'], parsed_data.get('warnings', {}), current_time)
 
         else:
             battery_addr = parsed_data.get('battery_address', 1)
@@ -1261,13 +1729,8 @@ class CANHostComputer:
                         val, unit = fmt_scalar(data_key, parsed_data[data_key])
                         self.update_table_item(can_id_display, label, val, unit, lang['normal'], current_time)
 
-                    st = parsed_data.get('status', {})
-                    for label, key in status_tbl:
-                        self.update_table_item(can_id_display, label, int(st.get(key, False)), '', lang['normal'], current_time)
-
-                    al = parsed_data.get('alarms', {})
-                    for label, key in alarm_tbl:
-                        self.update_table_item(can_id_display, label, int(al.get(key, False)), '', lang['normal'], current_time)
+                    self.update_flag_rows(can_id_display, status_tbl, parsed_data.get('status', {}), current_time)
+                    self.update_flag_rows(can_id_display, alarm_tbl, parsed_data.get('alarms', {}), current_time)
                     return
                 else:
                     # 旧版 table_200 回退
@@ -1276,7 +1739,11 @@ class CANHostComputer:
                             val, unit = fmt_scalar(data_key, parsed_data[data_key])
                         elif data_key in ('status', 'alarms'):
                             d = parsed_data.get(data_key, {})
-                            if isinstance(d, dict):
+                            if isinstance(d, FlagSet):
+                                on = d.active()
+                                val = '、'.join(on) if on else '正常'
+                                unit = ''
+                            elif isinstance(d, Mapping):
                                 on = [k for k, v in d.items() if v]
                                 val = '、'.join(on) if on else '正常'
                                 unit = ''
@@ -1297,17 +1764,59 @@ class CANHostComputer:
                 val, unit = fmt_scalar(data_key, parsed_data[data_key])
                 self.update_table_item(can_id_display, label, val, unit, lang['normal'], current_time)
 
+    def update_flag_rows(self, can_id_display, rows, flags, current_time):
+        """按位域填写标志行
+
+        rows 为 (表格参数, 标志名) 列表，每次都写入全部行（值未变化的行由 apply_table_item 跳过）。
+        FlagSet 与同一行组上一帧的原始值异或，只用于记录置位和清除的标志名。
+        """
+        lang = LANGUAGES[self.lang]
+        for label, key in rows:
+            self.update_table_item(can_id_display, label, int(flags.get(key, False)), '', lang['normal'], current_time)
+        if not isinstance(flags, FlagSet):
+            return
+
+        state_key = (can_id_display, flags.table)
+        previous = self.flag_bits.get(state_key)
+        self.flag_bits[state_key] = flags.bits
+        if previous is None:
+            return
+        set_names, cleared_names = flags.table.changes(previous, flags.bits)
+        changes = []
+        if set_names:
+            changes.append(f"置位 {', '.join(set_names)}")
+        if cleared_names:
+            changes.append(f"清除 {', '.join(cleared_names)}")
+        if changes:
+            self.log_message(f"{can_id_display} 标志变化: {'; '.join(changes)}")
+
     def update_table_item(self, can_id, parameter, value, unit, status, update_time):
-        """更新表格中的单个项目，如果不存在则创建"""
-        # 先检查是否已存在该项目
-        for item in self.data_tree.get_children():
-            values = self.data_tree.item(item)['values']
-            if values[0] == can_id and values[1] == parameter:
-                self.data_tree.item(item, values=(can_id, parameter, value, unit, status, update_time))
-                return
-        
-        # 如果不存在，创建新条目
-        self.data_tree.insert('', 'end', values=(can_id, parameter, value, unit, status, update_time))
+        """更新表格中的单个项目，如果不存在则创建（工作线程调用时排队到界面刷新）"""
+        values = (can_id, parameter, value, unit, status, update_time)
+        if self.is_gui_thread():
+            self.apply_table_item(*values)
+        else:
+            with self.ui_cells_lock:
+                self.ui_cells[(can_id, parameter)] = values
+
+    def apply_table_item(self, can_id, parameter, value, unit, status, update_time):
+        """在表格中写入单个项目（GUI线程执行）"""
+        values = (can_id, parameter, value, unit, status, update_time)
+        item = self.table_index.get((can_id, parameter))
+        if item is None:
+            # 如果不存在，创建新条目
+            self.insert_table_row(values)
+        elif self.table_row_values.get(item) != values:
+            # 值未变化时不再调用Tcl
+            self.data_tree.item(item, values=values)
+            self.table_row_values[item] = values
+
+    def insert_table_row(self, values):
+        """插入一行并登记到索引"""
+        item = self.data_tree.insert('', 'end', values=values)
+        self.table_index[(values[0], values[1])] = item
+        self.table_row_values[item] = tuple(values)
+        return item
 
     def create_send_data_table(self, parent):
         """创建发送数据表格"""
@@ -1354,28 +1863,36 @@ class CANHostComputer:
         # 清空现有数据
         for item in self.send_data_tree.get_children():
             self.send_data_tree.delete(item)
+        self.send_table_index = {}
         
         # 添加0x305数据项 - 初始状态为"停止发送"
-        self.send_data_tree.insert('', 'end', values=('0x305', lang['stop_send'], '0', lang['stop'], '--'))
+        self.send_table_index['0x305'] = self.send_data_tree.insert('', 'end', values=('0x305', lang['stop_send'], '0', lang['stop'], '--'))
         
         # 添加0x307数据项 - 初始状态为"停止发送"
-        self.send_data_tree.insert('', 'end', values=('0x307', lang['stop_send'], '0', lang['stop'], '--'))
+        self.send_table_index['0x307'] = self.send_data_tree.insert('', 'end', values=('0x307', lang['stop_send'], '0', lang['stop'], '--'))
     
-    def update_send_data_table(self, can_id, status, count, send_time):
+    def update_send_data_table(self, can_id, status, count, send_time, missed=0):
         """更新发送数据表格"""
         lang = LANGUAGES[self.lang]
+        state = f"{lang['missed']} {missed}" if missed else lang['normal']
         if can_id == 0x305:
-            self.update_send_table_item('0x305', status, str(count), lang['normal'], send_time)
+            self.update_send_table_item('0x305', status, str(count), state, send_time)
         elif can_id == 0x307:
-            self.update_send_table_item('0x307', status, str(count), lang['normal'], send_time)
+            self.update_send_table_item('0x307', status, str(count), state, send_time)
     
     def update_send_table_item(self, can_id, send_status, count, status, send_time):
-        """更新发送表格中的单个项目"""
-        for item in self.send_data_tree.get_children():
-            values = self.send_data_tree.item(item)['values']
-            if values[0] == can_id:
-                self.send_data_tree.item(item, values=(can_id, send_status, count, status, send_time))
-                break
+        """更新发送表格中的单个项目（工作线程调用时排队到界面刷新）"""
+        values = (can_id, send_status, count, status, send_time)
+        if self.is_gui_thread():
+            self.apply_send_table_item(*values)
+        else:
+            self.post_ui(('send_cell', values))
+
+    def apply_send_table_item(self, can_id, send_status, count, status, send_time):
+        """在发送表格中写入单个项目（GUI线程执行）"""
+        item = self.send_table_index.get(can_id)
+        if item is not None:
+            self.send_data_tree.item(item, values=(can_id, send_status, count, status, send_time))
 
     def start_auto_save_on_startup(self):
         """程序启动时自动开始保存日志"""
@@ -1448,6 +1965,8 @@ class CANHostComputer:
                     # 更新特定的标签文本
                     if '语言/Language:' in text or 'Language:' in text:
                         widget.config(text=lang['language'])
+                    elif '后端:' in text or 'Backend:' in text:
+                        widget.config(text=lang['backend'])
                     elif '设备类型:' in text or 'Device Type:' in text:
                         widget.config(text=lang.get('device_type', '设备类型:' if self.lang == 'zh' else 'Device Type:'))
                     elif '设备索引:' in text or 'Device Index:' in text:
@@ -1466,14 +1985,32 @@ class CANHostComputer:
                         widget.config(text=lang['receive'] + ':')
                     elif '心跳状态:' in text or 'Heartbeat:' in text:
                         widget.config(text=lang['heartbeat_status'] + ':')
+                    elif '丢弃:' in text or 'Dropped:' in text:
+                        widget.config(text=lang['dropped'] + ':')
+                    elif '接收轮询:' in text or 'Rx Polls:' in text:
+                        widget.config(text=lang['rx_loop'] + ':')
+                    elif '总线状态:' in text or 'Bus Health:' in text:
+                        widget.config(text=lang['bus_health'] + ':')
                 elif isinstance(widget, ttk.Button):
                     text = widget.cget('text')
                     if '清空日志' in text or 'Clear Log' in text:
                         widget.config(text=lang['clear_log'])
+                    elif '导出总线状态' in text or 'Export Bus Health' in text:
+                        widget.config(text=lang['export_bus_health'])
+                    elif '刷新身份信息' in text or 'Refresh Identity' in text:
+                        widget.config(text=lang['refresh_identity'])
+                    elif '导出身份信息' in text or 'Export Identity' in text:
+                        widget.config(text=lang['export_identity'])
                 elif isinstance(widget, ttk.Checkbutton):
                     text = widget.cget('text')
                     if '自动保存日志' in text or 'Auto Save Log' in text:
                         widget.config(text=lang['auto_save_log'])
+                    elif '仅接收协议报文' in text or 'Protocol IDs Only' in text:
+                        widget.config(text=lang['protocol_filter'])
+                    elif '双通道' in text or 'Dual Channel' in text:
+                        widget.config(text=lang['dual_channel'])
+                    elif '原始报文捕获' in text or 'Raw Capture' in text:
+                        widget.config(text=lang['raw_capture'])
                 
                 # 递归处理子控件
                 for child in widget.winfo_children():
@@ -1504,13 +2041,20 @@ class CANHostComputer:
                 self.send_data_tree.heading(col, text=column_texts[i])
 
     def set_table_item_color(self, can_id, parameter, color):
-        """设置表格中特定行的字体颜色"""
-        for item in self.data_tree.get_children():
-            values = self.data_tree.item(item)['values']
-            if values[0] == can_id and values[1] == parameter:
-                self.data_tree.tag_configure('heartbeat_stop', foreground=color)
-                self.data_tree.item(item, tags=('heartbeat_stop',))
-                break
+        """设置表格中特定行的字体颜色（工作线程调用时排队到界面刷新）"""
+        if self.is_gui_thread():
+            self.apply_table_item_color(can_id, parameter, color)
+        else:
+            self.post_ui(('color', can_id, parameter, color))
+
+    def apply_table_item_color(self, can_id, parameter, color):
+        """设置表格中特定行的字体颜色（GUI线程执行）"""
+        item = self.table_index.get((can_id, parameter))
+        if item is None or self.table_row_colors.get(item) == color:
+            return
+        self.data_tree.tag_configure('heartbeat_stop', foreground=color)
+        self.data_tree.item(item, tags=('heartbeat_stop',))
+        self.table_row_colors[item] = color
 
 def main():
     root = tk.Tk()
@@ -1519,6 +2063,7 @@ def main():
     def on_closing():
         if app.auto_save_var.get():
             app.stop_auto_save()
+        app.stop_capture()
         root.destroy()
     
     root.protocol("WM_DELETE_WINDOW", on_closing)
@@ -0,0 +1,188 @@
+# 电池身份信息：按电池重组分成两帧的版本字符串、MAC地址和模块ID，并缓存重组结果
+
+import csv
+import threading
+
+from can_protocol_config import IDENTITY_REQUEST_TIMEOUT
+
+# 报文系列 -> (字段, 片段序号)；每个版本字符串分成两帧，每帧8个字符
+VERSION_PARTS = {
+    0x450: ('controller_version', 0),
+    0x460: ('controller_version', 1),
+    0x470: ('bms_version', 0),
+    0x480: ('bms_version', 1),
+}
+ADDRESS_FAMILY = 0x4A0  # ESP32 MAC地址和模块ID
+IDENTITY_FAMILIES = frozenset(VERSION_PARTS) | {ADDRESS_FAMILY}
+
+IDENTITY_FIELDS = ('controller_version', 'bms_version', 'esp32_mac_address', 'module_id')
+EXPORT_FIELDS = ('battery_address',) + IDENTITY_FIELDS + ('response_time', 'requests', 'timeouts')
+
+
+def _decode_text(data):
+    """与 parse_45n_message 等相同：去掉0字节，每字节一个字符"""
+    return data.replace(b'\x00', b'').decode('latin-1')
+
+
+class BatteryIdentity:
+    """一个电池的身份信息，字段在对应报文（版本字符串需两帧）到齐前为None"""
+    __slots__ = ('battery_address', 'parts', 'controller_version', 'bms_version',
+                 'esp32_mac_address', 'module_id', 'updated', 'requested', 'answered',
+                 'response_time', 'requests', 'timeouts')
+
+    def __init__(self, battery_address):
+        self.battery_address = battery_address
+        self.parts = {}             # 报文系列 -> 最近的数据区
+        self.controller_version = None
+        self.bms_version = None
+        self.esp32_mac_address = None
+        self.module_id = None
+        self.updated = None         # 最近一次字段变化的时间（主机单调时钟）
+        self.requested = None       # 未应答的刷新请求时间
+        self.answered = None        # 最近一次刷新请求得到应答的时间
+        self.response_time = None   # 最近一次刷新请求到全部身份报文到齐的秒数
+        self.requests = 0
+        self.timeouts = 0
+
+    @property
+    def complete(self):
+        return all(getattr(self, field) is not None for field in IDENTITY_FIELDS)
+
+    def as_dict(self):
+        row = {'battery_address': self.battery_address}
+        for field in IDENTITY_FIELDS:
+            row[field] = getattr(self, field)
+        row['response_time'] = None if self.response_time is None else round(self.response_time, 3)
+        row['requests'] = self.requests
+        row['timeouts'] = self.timeouts
+        return row
+
+
+class BatteryIdentityStore:
+    """按电池地址缓存身份信息
+
+    observe() 保存每个身份报文的数据区，任一帧变化时重新组装对应字段；数据与上次相同时直接返回。
+    request() 清空所选电池已收到的帧并记下请求时间，之后全部身份报文重新到齐即记录响应时间，
+    超过 timeout 仍未到齐时由 expired() 报告。
+    """
+    def __init__(self, timeout=IDENTITY_REQUEST_TIMEOUT):
+        self.timeout = timeout
+        self._batteries = {}
+        self._broadcast = None  # 对全部电池的请求时间，请求后首次出现的电池也按它计时
+        self._lock = threading.Lock()
+
+    def observe(self, can_id, data, now):
+        """记录一帧身份报文
+
+        重组后的字段变化或刷新请求得到应答时返回该电池的BatteryIdentity，否则返回None。
+        """
+        family = can_id & 0xFF0
+        if family not in IDENTITY_FAMILIES or len(data) < 8:
+            return None
+        address = can_id & 0x0F
+        if type(data) is not bytes:
+            data = bytes(data)
+        with self._lock:
+            identity = self._batteries.get(address)
+            if identity is None:
+                identity = self._batteries[address] = BatteryIdentity(address)
+                if self._broadcast is not None:
+                    identity.requested = self._broadcast
+                    identity.requests += 1
+            parts = identity.parts
+            if parts.get(family) == data:
+                return None
+            parts[family] = data
+
+            if family == ADDRESS_FAMILY:
+                changed = self._set(identity, 'esp32_mac_address', data[:6].hex(':'))
+                changed = self._set(identity, 'module_id', data[6]) or changed
+            else:
+                field, index = VERSION_PARTS[family]
+                other = parts.get(family + 0x10 if index == 0 else family - 0x10)
+                changed = False
+                if other is not None:
+                    first, second = (data, other) if index == 0 else (other, data)
+                    changed = self._set(identity, field, _decode_text(first) + _decode_text(second))
+
+            answered = identity.requested is not None and len(parts) == len(IDENTITY_FAMILIES)
+            if answered:
+                identity.response_time = now - identity.requested
+                identity.requested = None
+                identity.answered = now
+            if changed:
+                identity.updated = now
+            return identity if changed or answered else None
+
+    @staticmethod
+    def _set(identity, field, value):
+        if getattr(identity, field) == value:
+            return False
+        setattr(identity, field, value)
+        return True
+
+    def request(self, now, addresses=None):
+        """开始一次刷新：清空所选电池（默认全部）已收到的帧，返回涉及的电池地址
+
+        已显示的字段保留到新数据到达为止。
+        """
+        with self._lock:
+            if addresses is None:
+                self._broadcast = now
+                targets = list(self._batteries.values())
+            else:
+                targets = [self._batteries.setdefault(address, BatteryIdentity(address))
+                           for address in addresses]
+            for identity in targets:
+                identity.parts.clear()
+                identity.requested = now
+                identity.requests += 1
+            return [identity.battery_address for identity in targets]
+
+    def expired(self, now):
+        """返回超时仍未应答的电池地址，并清除其请求状态"""
+        if not self.pending:
+            return []
+        expired = []
+        with self._lock:
+            for identity in self._batteries.values():
+                if identity.requested is not None and now - identity.requested > self.timeout:
+                    identity.requested = None
+                    identity.timeouts += 1
+                    expired.append(identity.battery_address)
+            if self._broadcast is not None and now - self._broadcast > self.timeout:
+                self._broadcast = None
+        return expired
+
+    @property
+    def pending(self):
+        """是否有未应答的刷新请求"""
+        return self._broadcast is not None or any(
+            identity.requested is not None for identity in tuple(self._batteries.values()))
+
+    def get(self, battery_address):
+        return self._batteries.get(battery_address)
+
+    def identities(self):
+        """按电池地址排序的BatteryIdentity列表"""
+        with self._lock:
+            return [self._batteries[address] for address in sorted(self._batteries)]
+
+    def snapshot(self):
+        """按电池地址排序的身份信息列表（字典）"""
+        with self._lock:
+            return [self._batteries[address].as_dict() for address in sorted(self._batteries)]
+
+    def reset(self):
+        with self._lock:
+            self._batteries.clear()
+            self._broadcast = None
+
+    def export_csv(self, filename):
+        """把缓存的身份信息导出为CSV，返回导出的行数"""
+        rows = self.snapshot()
+        with open(filename, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
@@ -0,0 +1,153 @@
+# 异步日志文件写入
+
+import threading
+import time
+from queue import Queue, Empty, Full
+
+# 缓冲达到该大小（按编码后的字节计）时写盘
+LOG_FLUSH_BYTES = 64 * 1024
+
+# 写入队列上限（条），队列满时丢弃新条目并计数
+LOG_QUEUE_LIMIT = 100000
+
+# 缓冲中最早的数据等待超过该时间（秒）时写盘
+LOG_FLUSH_INTERVAL = 0.2
+
+_WAKE = object()  # 唤醒写入线程处理写盘/关闭请求的标记
+
+
+class AsyncLogWriter:
+    """后台线程批量写日志文件
+
+    write() 只把文本放入队列，由专用线程按大小或时间策略合并写盘；
+    flush() 请求立即写盘（报警、心跳丢失、退出时使用），close() 写完剩余数据后关闭文件。
+    队列满时 write() 丢弃文本并计入 dropped；写盘和关闭请求不经过数据队列，
+    只尝试放入唤醒标记（队列满时写入线程本就会很快取到下一条），调用方不会因磁盘卡顿而阻塞。
+    """
+    def __init__(self, filename, encoding='utf-8', flush_bytes=LOG_FLUSH_BYTES,
+                 flush_interval=LOG_FLUSH_INTERVAL, queue_limit=LOG_QUEUE_LIMIT):
+        self.filename = filename
+        self.encoding = encoding
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self._file = open(filename, 'wb')
+        self._queue = Queue(maxsize=queue_limit)
+        self._closed = False
+        self._flush_events = []             # 等待写盘完成的Event
+        self._close_requested = threading.Event()
+        self._control_lock = threading.Lock()
+        self.bytes_written = 0
+        self.flush_count = 0
+        self.dropped = 0
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name='AsyncLogWriter', daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        """返回写入统计"""
+        return {
+            'queue_depth': self.queue_depth,
+            'bytes_written': self.bytes_written,
+            'flush_count': self.flush_count,
+            'dropped': self.dropped,
+        }
+
+    def write(self, text):
+        if not self._closed:
+            try:
+                self._queue.put_nowait(text)
+            except Full:
+                self.dropped += 1
+
+    def flush(self, wait=False, timeout=1.0):
+        """请求立即写盘，wait为True时最多等待timeout秒直到写盘完成"""
+        if self._closed:
+            return
+        done = threading.Event()
+        with self._control_lock:
+            self._flush_events.append(done)
+        self._wake()
+        if wait:
+            done.wait(timeout)
+
+    def close(self, timeout=2.0):
+        """写完队列中剩余的数据并关闭文件，最多等待timeout秒"""
+        if self._closed:
+            return
+        self._closed = True
+        self._close_requested.set()
+        self._wake()
+        self._thread.join(timeout)
+
+    def _wake(self):
+        try:
+            self._queue.put_nowait(_WAKE)
+        except Full:
+            pass  # 队列非空，写入线程取下一条后会检查请求
+
+    def _write_out(self, parts):
+        if not parts:
+            return
+        data = b''.join(parts)
+        try:
+            self._file.write(data)
+            self._file.flush()
+            self.bytes_written += len(data)
+            self.flush_count += 1
+        except Exception as e:
+            self.error = e
+
+    def _run(self):
+        parts = []
+        pending = 0
+        first_pending = None
+        while True:
+            timeout = None
+            if parts:
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - first_pending))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except Empty:
+                # 超过时间窗口，写盘
+                self._write_out(parts)
+                parts, pending, first_pending = [], 0, None
+                item = None
+
+            if item is not None and item is not _WAKE:
+                if not parts:
+                    first_pending = time.monotonic()
+                data = item.encode(self.encoding)
+                parts.append(data)
+                pending += len(data)
+                if pending >= self.flush_bytes:
+                    self._write_out(parts)
+                    parts, pending, first_pending = [], 0, None
+
+            if not self._flush_events and not self._close_requested.is_set():
+                continue
+
+            # 写盘/关闭请求：请求前已入队的数据一并写出
+            closing = self._close_requested.is_set()
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except Empty:
+                    break
+                if item is not _WAKE:
+                    parts.append(item.encode(self.encoding))
+            self._write_out(parts)
+            parts, pending, first_pending = [], 0, None
+            with self._control_lock:
+                events, self._flush_events = self._flush_events, []
+            for done in events:
+                done.set()
+            if closing:
+                try:
+                    self._file.close()
+                except Exception as e:
+                    self.error = e
+                return
@@ -1,5 +1,20 @@
  # CAN协议配置文件
 
+import csv
+import os
+import re
+import struct
+import sys
+from collections import namedtuple
+from functools import partial
+
+from can_flags import FlagTable, FlagSet
+
+try:
+    import numpy as np  # 可选依赖：批量解码使用
+except ImportError:
+    np = None
+
 # 波特率设置
 BAUDRATE_250K = 250000
 BAUDRATE_500K = 500000
@@ -238,9 +253,41 @@ MESSAGE_STRUCTURES = {
 # 心跳超时设置（秒）
 HEARTBEAT_TIMEOUT = 3
 
+# 身份信息（版本、MAC地址、模块ID）按需刷新：电池只在启动时和收到请求时发送，协议文档未给出请求报文，
+# IDENTITY_REQUEST_ID为None时界面上的刷新按钮不可用；填入请求报文的CAN ID后刷新时发送 IDENTITY_REQUEST_DATA
+IDENTITY_REQUEST_ID = None
+IDENTITY_REQUEST_DATA = bytes(8)
+
+# 刷新请求后等待全部身份报文到齐的超时时间（秒）
+IDENTITY_REQUEST_TIMEOUT = 10
+
 # 发送间隔设置（秒）
 SEND_INTERVAL = 1
 
+# 周期发送报文表：(CAN ID, 数据生成方法名, 周期秒, 相位秒)
+PERIODIC_TX_MESSAGES = [
+    (0x305, 'create_305_message', SEND_INTERVAL, 0.0),
+    (0x307, 'create_307_message', SEND_INTERVAL, 0.0),
+]
+
+# 设备未接受全部报文（发送FIFO满）时，重试前等待的时间（秒），第n次重试等待 n 倍
+TX_RETRY_BACKOFF = 0.002
+
+# 界面刷新频率（Hz）：接收线程只写队列，界面按此频率批量刷新
+UI_REFRESH_HZ = 10
+
+# 接收线程到界面的队列上限，队列满时丢弃新条目并计数
+UI_QUEUE_LIMIT = 20000
+
+# 队列满时可以丢弃的条目类型；其余条目（函数调用、颜色、发送表格）不丢弃
+UI_SHEDDABLE_KINDS = frozenset({'log'})
+
+# 内存中保留的日志记录条数（更早的记录只在日志文件中）
+LOG_BUFFER_SIZE = 100000
+
+# 日志文本框中最多显示的行数
+LOG_VIEW_LINES = 2000
+
 # 创芯科技设备设置
 CANALYST_DEVICE_TYPE = 4  # VCI_USBCAN2
 CANALYST_DEVICE_INDEX = 0
@@ -309,76 +356,58 @@ def parse_356_message(data):
     else:
         return None
 
+# 0x35A 报警位（字节0-3）和警告位（字节4-7），每个标志占2位，任一位置位即有效
+ALARM_FLAGS_35A = FlagTable([
+    # Byte 0
+    ('general_alarm', 0x03),
+    ('battery_high_voltage_alarm', 0x0C),
+    ('battery_low_voltage_alarm', 0x30),
+    ('battery_high_temp_alarm', 0xC0),
+    # Byte 1
+    ('battery_low_temp_alarm', 0x03 << 8),
+    ('battery_high_temp_charge_alarm', 0x0C << 8),
+    ('battery_low_temp_charge_alarm', 0x30 << 8),
+    ('battery_high_current_alarm', 0xC0 << 8),
+    # Byte 2
+    ('battery_high_charge_current_alarm', 0x03 << 16),
+    ('contactor_alarm', 0x0C << 16),
+    ('short_circuit_alarm', 0x30 << 16),
+    ('bms_internal_alarm', 0xC0 << 16),
+    # Byte 3（bits 2-7 保留）
+    ('cell_imbalance_alarm', 0x03 << 24),
+])
+
+WARNING_FLAGS_35A = FlagTable([
+    # Byte 4
+    ('general_warning', 0x03),
+    ('battery_high_voltage', 0x0C),
+    ('battery_low_voltage', 0x30),
+    ('battery_high_temp', 0xC0),
+    # Byte 5
+    ('battery_low_temp', 0x03 << 8),
+    ('battery_high_temp_charge', 0x0C << 8),
+    ('battery_low_temp_charge', 0x30 << 8),
+    ('battery_high_current', 0xC0 << 8),
+    # Byte 6
+    ('battery_high_charge_current', 0x03 << 16),
+    ('contactor_warning', 0x0C << 16),
+    ('short_circuit_warning', 0x30 << 16),
+    ('bms_internal', 0xC0 << 16),
+    # Byte 7：系统状态（bits 4-7 保留）
+    ('cell_imbalance', 0x03 << 24),
+    ('system_online', 0x0C << 24),
+])
+
 def parse_35A_message(data):
-    """解析0x35A报文 - BMS警告和报警信息"""
+    """解析0x35A报文 - BMS警告和报警信息（位域以FlagSet返回）"""
     if len(data) >= 8:
-        # 解析报警位（字节0-3）
-        alarms = {}
-        
-        # Byte 0: 报警信息
-        byte0 = data[0]
-        alarms['general_alarm'] = bool(byte0 & 0x03)        # bits 0+1
-        alarms['battery_high_voltage_alarm'] = bool(byte0 & 0x0C)    # bits 2+3
-        alarms['battery_low_voltage_alarm'] = bool(byte0 & 0x30)     # bits 4+5
-        alarms['battery_high_temp_alarm'] = bool(byte0 & 0xC0)       # bits 6+7
-        
-        # Byte 1: 更多报警信息
-        byte1 = data[1]
-        alarms['battery_low_temp_alarm'] = bool(byte1 & 0x03)        # bits 0+1
-        alarms['battery_high_temp_charge_alarm'] = bool(byte1 & 0x0C) # bits 2+3
-        alarms['battery_low_temp_charge_alarm'] = bool(byte1 & 0x30)  # bits 4+5
-        alarms['battery_high_current_alarm'] = bool(byte1 & 0xC0)     # bits 6+7
-        
-        # Byte 2: 更多报警信息
-        byte2 = data[2]
-        alarms['battery_high_charge_current_alarm'] = bool(byte2 & 0x03) # bits 0+1
-        alarms['contactor_alarm'] = bool(byte2 & 0x0C)                   # bits 2+3
-        alarms['short_circuit_alarm'] = bool(byte2 & 0x30)               # bits 4+5
-        alarms['bms_internal_alarm'] = bool(byte2 & 0xC0)                # bits 6+7
-        
-        # Byte 3: 更多报警信息
-        byte3 = data[3]
-        alarms['cell_imbalance_alarm'] = bool(byte3 & 0x03)          # bits 0+1
-        # bits 2-7: Reserved (保留位)
-        
-        # 解析警告位（字节4-7）
-        warnings = {}
-        
-        # Byte 4: 警告信息
-        byte4 = data[4]
-        warnings['general_warning'] = bool(byte4 & 0x03)        # bits 0+1
-        warnings['battery_high_voltage'] = bool(byte4 & 0x0C)    # bits 2+3
-        warnings['battery_low_voltage'] = bool(byte4 & 0x30)     # bits 4+5
-        warnings['battery_high_temp'] = bool(byte4 & 0xC0)       # bits 6+7
-        
-        # Byte 5: 更多警告信息
-        byte5 = data[5]
-        warnings['battery_low_temp'] = bool(byte5 & 0x03)        # bits 0+1
-        warnings['battery_high_temp_charge'] = bool(byte5 & 0x0C) # bits 2+3
-        warnings['battery_low_temp_charge'] = bool(byte5 & 0x30)  # bits 4+5
-        warnings['battery_high_current'] = bool(byte5 & 0xC0)     # bits 6+7
-        
-        # Byte 6: 更多警告信息
-        byte6 = data[6]
-        warnings['battery_high_charge_current'] = bool(byte6 & 0x03) # bits 0+1
-        warnings['contactor_warning'] = bool(byte6 & 0x0C)           # bits 2+3
-        warnings['short_circuit_warning'] = bool(byte6 & 0x30)       # bits 4+5
-        warnings['bms_internal'] = bool(byte6 & 0xC0)                # bits 6+7
-        
-        # Byte 7: 系统状态和更多警告
-        byte7 = data[7]
-        warnings['cell_imbalance'] = bool(byte7 & 0x03)          # bits 0+1
-        warnings['system_online'] = bool(byte7 & 0x0C)           # bits 2+3 (System status)
-        # bits 4-7: Reserved (保留位)
-        
         return {
-            'alarms': alarms,
-            'warnings': warnings
+            'alarms': FlagSet(unsigned_32bit(data[3], data[2], data[1], data[0]), ALARM_FLAGS_35A),
+            'warnings': FlagSet(unsigned_32bit(data[7], data[6], data[5], data[4]), WARNING_FLAGS_35A)
         }
     else:
         return None
 
-
 # 通用解析函数
 def unsigned_16bit(high_byte, low_byte):
     """将两个字节转换为无符号16位整数"""
@@ -392,6 +421,38 @@ def unsigned_32bit(byte3, byte2, byte1, byte0):
     """将四个字节转换为无符号32位整数"""
     return (byte3 << 24) | (byte2 << 16) | (byte1 << 8) | byte0
 
+# 0x20n 状态位（字节2-3）和报警位（字节4-7）
+STATUS_FLAGS_20N = FlagTable([
+    ('Heater', 0x01),
+    ('MCB status', 0x02),
+    ('Top Up', 0x04),
+    ('Soft Start', 0x08),
+    ('OCC Recovery', 0x10),
+])
+
+ALARM_FLAGS_20N = FlagTable([
+    ('COTC', 0x01),
+    ('COTD', 0x02),
+    ('CUTC', 0x04),
+    ('CUTD', 0x08),
+    ('System Lock', 0x10),
+    ('SCD', 0x20),
+    ('MOT', 0x40),
+    ('DCDC_OT', 0x80),
+    ('CMC', 0x100),
+    ('BVP', 0x200),
+    ('CTD', 0x400),
+    ('MCB_TRIP', 0x800),
+    ('UCM', 0x1000),
+    ('WDT', 0x2000),
+    ('U_SOC', 0x4000),
+    ('CUVC', 0x8000),
+    ('CUV', 0x10000),
+    ('COV', 0x20000),
+    ('OCC', 0x40000),
+    ('OCD', 0x80000),
+])
+
 def parse_20n_message(data, battery_address=1):
     """解析0x20n报文 - 电池模式和状态"""
     if len(data) >= 8:
@@ -399,39 +460,10 @@ def parse_20n_message(data, battery_address=1):
         state_of_charge = data[1] * 0.5  # SOC in 0.5% resolution
         
         # Status bits (16-bit bitfield from bytes 2-3)
-        status_bits = unsigned_16bit(data[3], data[2])
-        status = {
-            'Heater': bool(status_bits & 0x01),
-            'MCB status': bool(status_bits & 0x02),
-            'Top Up': bool(status_bits & 0x04),
-            'Soft Start': bool(status_bits & 0x08),
-            'OCC Recovery': bool(status_bits & 0x10),
-        }
+        status = FlagSet(unsigned_16bit(data[3], data[2]), STATUS_FLAGS_20N)
         
         # Alarms (32-bit bitfield from bytes 4-7)
-        alarms_bits = unsigned_32bit(data[7], data[6], data[5], data[4])
-        alarms = {
-            'COTC': bool(alarms_bits & 0x01),
-            'COTD': bool(alarms_bits & 0x02),
-            'CUTC': bool(alarms_bits & 0x04),
-            'CUTD': bool(alarms_bits & 0x08),
-            'System Lock': bool(alarms_bits & 0x10),
-            'SCD': bool(alarms_bits & 0x20),
-            'MOT': bool(alarms_bits & 0x40),
-            'DCDC_OT': bool(alarms_bits & 0x80),
-            'CMC': bool(alarms_bits & 0x100),
-            'BVP': bool(alarms_bits & 0x200),
-            'CTD': bool(alarms_bits & 0x400),
-            'MCB_TRIP': bool(alarms_bits & 0x800),
-            'UCM': bool(alarms_bits & 0x1000),
-            'WDT': bool(alarms_bits & 0x2000),
-            'U_SOC': bool(alarms_bits & 0x4000),
-            'CUVC': bool(alarms_bits & 0x8000),
-            'CUV': bool(alarms_bits & 0x10000),
-            'COV': bool(alarms_bits & 0x20000),
-            'OCC': bool(alarms_bits & 0x40000),
-            'OCD': bool(alarms_bits & 0x80000),
-        }
+        alarms = FlagSet(unsigned_32bit(data[7], data[6], data[5], data[4]), ALARM_FLAGS_20N)
         
         return {
             'operation_mode': operation_mode,
@@ -650,59 +682,323 @@ def get_battery_address_from_can_id(can_id):
         return can_id & 0x0F
     return 1  # 默认地址
 
+# 固定ID报文的解析函数
+FIXED_MESSAGE_PARSERS = {
+    0x351: parse_351_message,
+    0x355: parse_355_message,
+    0x356: parse_356_message,
+    0x35A: parse_35A_message,
+}
+
+# 按电池地址区分的报文系列（CAN ID低4位为电池地址）
+BATTERY_MESSAGE_PARSERS = {
+    0x200: parse_20n_message,
+    0x210: parse_21n_message,
+    0x220: parse_22n_message,
+    0x230: parse_23n_message,
+    0x240: parse_24n_message,
+    0x250: parse_25n_message,
+    0x260: parse_26n_message,
+    0x400: parse_40n_message,
+    0x410: parse_41n_message,
+    0x420: parse_42n_message,
+    0x430: parse_43n_message,
+    0x440: parse_44n_message,
+    0x450: parse_45n_message,
+    0x460: parse_46n_message,
+    0x470: parse_47n_message,
+    0x480: parse_48n_message,
+    0x490: parse_49n_message,
+    0x4A0: parse_4An_message,
+}
+
+# ---------- 由 can_new_add.csv 规格编译的解码器 ----------
+
+# 规格中的数值类型 -> struct格式（U24没有原生格式，按3字节读出后再转换）
+SPEC_TYPE_FORMATS = {
+    'U8': 'B', 'S8': 'b',
+    'U16': 'H', 'S16': 'h',
+    'U24': '3s',
+    'U32': 'I', 'S32': 'i',
+}
+SPEC_TYPE_SIZES = {'U8': 1, 'S8': 1, 'U16': 2, 'S16': 2, 'U24': 3, 'U32': 4, 'S32': 4}
+
+SPEC_FILENAME = 'can_new_add.csv'
+
+CodecField = namedtuple('CodecField', ['name', 'offset', 'data_type', 'scale', 'unit'])
+
+def get_spec_path(filename=SPEC_FILENAME):
+    """获取协议规格文件路径，兼容PyInstaller打包后的环境"""
+    if getattr(sys, 'frozen', False):
+        base_path = sys._MEIPASS
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, filename)
+
+class MessageCodec:
+    """由规格编译出的报文系列解码器：一个预编译的struct.Struct加一组缩放系数"""
+    __slots__ = ('family', 'fields', 'names', 'scales', 'struct', 'length', '_has_u24')
+
+    def __init__(self, family, fields, length=8):
+        self.family = family
+        self.fields = tuple(sorted(fields, key=lambda f: f.offset))
+        self.length = length
+
+        fmt = '<'
+        pos = 0
+        for field in self.fields:
+            if field.offset < pos:
+                raise ValueError(f"0x{family:03X} 字段 {field.name} 与前一字段重叠")
+            if field.offset > pos:
+                fmt += f'{field.offset - pos}x'
+            fmt += SPEC_TYPE_FORMATS[field.data_type]
+            pos = field.offset + SPEC_TYPE_SIZES[field.data_type]
+        if pos > length:
+            raise ValueError(f"0x{family:03X} 字段超出报文长度")
+        if pos < length:
+            fmt += f'{length - pos}x'
+
+        self.struct = struct.Struct(fmt)
+        self.names = tuple(f.name for f in self.fields)
+        # 缩放系数为1时保持整数，与手写解析结果一致
+        self.scales = tuple(None if f.scale == 1 else f.scale for f in self.fields)
+        self._has_u24 = any(f.data_type == 'U24' for f in self.fields)
+
+    def decode(self, data, battery_address=1):
+        """解码一帧数据，长度不足时返回None"""
+        if len(data) < self.length:
+            return None
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data)
+        values = self.struct.unpack_from(data)
+        if self._has_u24:
+            values = [int.from_bytes(v, 'little') if type(v) is bytes else v for v in values]
+        result = {name: (value if scale is None else value * scale)
+                  for name, scale, value in zip(self.names, self.scales, values)}
+        result['battery_address'] = battery_address
+        return result
+
+def _parse_spec_family(can_id_text):
+    """把规格中的 '0x21n' 形式转换为报文系列基址 0x210"""
+    text = can_id_text.strip().lower()
+    if not text.startswith('0x') or not text.endswith('n'):
+        return None
+    try:
+        return int(text[:-1] + '0', 16)
+    except ValueError:
+        return None
+
+def load_message_spec(path=None):
+    """读取CSV规格，返回 {报文系列: [CodecField 或 None(不支持的类型)]}"""
+    path = path or get_spec_path()
+    spec = {}
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # 表头
+        for row in reader:
+            if len(row) < 8:
+                continue
+            family = _parse_spec_family(row[0])
+            name = row[3].strip()
+            if family is None or not row[1].strip() or not name:
+                continue
+            spec.setdefault(family, [])
+            data_type = row[5].strip()
+            if name.lower() == 'reserved' and not data_type:
+                continue
+            if data_type not in SPEC_TYPE_FORMATS:
+                # 枚举、位域、字符串等类型仍由手写解析处理
+                spec[family].append(None)
+                continue
+            scale_text = row[6].strip()
+            scale = float(scale_text) if scale_text else 1
+            if scale == int(scale) and int(scale) == 1:
+                scale = 1
+            spec[family].append(CodecField(name, int(row[1]), data_type, scale, row[7].strip()))
+    return spec
+
+def compile_message_codecs(path=None):
+    """把规格编译为 {报文系列: MessageCodec}，只编译全部字段均为数值类型的系列"""
+    try:
+        spec = load_message_spec(path)
+    except OSError as e:
+        print(f"读取协议规格失败: {e}")
+        return {}
+    codecs = {}
+    for family, fields in spec.items():
+        if not fields or None in fields:
+            continue
+        try:
+            codecs[family] = MessageCodec(family, fields)
+        except ValueError as e:
+            print(f"编译报文规格失败: {e}")
+    return codecs
+
+def load_message_periods(path=None):
+    """读取CSV规格中各报文系列的发送周期（"Every N second"），返回 {报文系列: 秒}"""
+    path = path or get_spec_path()
+    periods = {}
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # 表头
+        for row in reader:
+            if len(row) < 11 or row[1].strip():
+                continue
+            family = _parse_spec_family(row[0])
+            match = re.match(r'every\s+(\d+(?:\.\d+)?)\s*s', row[10].strip().lower())
+            if family is not None and match:
+                periods[family] = float(match.group(1))
+    return periods
+
+# 用于核对编译解码器与手写解析函数的探测数据
+CODEC_PROBE_PAYLOADS = (
+    bytes(8),
+    bytes([0xFF] * 8),
+    bytes([0x01, 0x80, 0x7F, 0xFE, 0x34, 0x12, 0xCD, 0xAB]),
+    bytes(range(0x11, 0x99, 0x11)),
+)
+
+def verify_codec(codec, parser):
+    """用探测数据比较编译解码器与手写解析函数的结果是否完全一致"""
+    for payload in CODEC_PROBE_PAYLOADS:
+        if codec.decode(payload, battery_address=3) != parser(payload, battery_address=3):
+            return False
+    return True
+
+def verify_compiled_codecs(codecs):
+    """返回与手写解析结果不一致的报文系列列表"""
+    return [family for family, codec in codecs.items()
+            if family in BATTERY_MESSAGE_PARSERS
+            and not verify_codec(codec, BATTERY_MESSAGE_PARSERS[family])]
+
+def select_family_decoders(codecs):
+    """为每个报文系列选择解码函数：优先使用已核对的编译解码器，否则用手写解析"""
+    decoders = dict(BATTERY_MESSAGE_PARSERS)
+    mismatched = set(verify_compiled_codecs(codecs))
+    for family in sorted(mismatched):
+        print(f"报文系列0x{family:03X}的规格解码结果与手写解析不一致，保留手写解析")
+    for family, codec in codecs.items():
+        if family not in mismatched:
+            decoders[family] = codec.decode
+    return decoders
+
+# 导入时编译一次
+MESSAGE_CODECS = compile_message_codecs()
+FAMILY_DECODERS = select_family_decoders(MESSAGE_CODECS)
+
+try:
+    MESSAGE_PERIODS = load_message_periods()
+except OSError as e:
+    print(f"读取报文周期失败: {e}")
+    MESSAGE_PERIODS = {}
+
+# ---------- NumPy 批量解码 ----------
+
+# 规格数值类型对应的小端NumPy类型（U24单独拼接）
+SPEC_TYPE_DTYPES = {
+    'U8': '<u1', 'S8': '<i1',
+    'U16': '<u2', 'S16': '<i2',
+    'U32': '<u4', 'S32': '<i4',
+}
+
+# 已通过核对、可用于批量解码的编译解码器
+BATCH_CODECS = {family: codec for family, codec in MESSAGE_CODECS.items()
+                if FAMILY_DECODERS.get(family) == codec.decode}
+
+def message_families(can_ids):
+    """向量化计算报文系列：0x2nn/0x4nn取高位，其余ID保持不变"""
+    ids = np.asarray(can_ids, dtype=np.uint32)
+    families = ids.copy()
+    per_battery = ((ids >= 0x200) & (ids <= 0x2FF)) | ((ids >= 0x400) & (ids <= 0x4FF))
+    families[per_battery] &= 0xFF0
+    return families
+
+def _decode_column(group, field):
+    """把一组(k, 8)的数据按字段解码为一列"""
+    offset = field.offset
+    if field.data_type == 'U24':
+        raw = group[:, offset:offset + 3].astype(np.uint32)
+        values = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+    else:
+        size = SPEC_TYPE_SIZES[field.data_type]
+        values = np.ascontiguousarray(group[:, offset:offset + size]).view(
+            SPEC_TYPE_DTYPES[field.data_type]).reshape(-1)
+    if field.scale != 1:
+        values = values * field.scale
+    return values
+
+def decode_batch(can_ids, payloads, lengths=None):
+    """批量解码一组报文
+
+    can_ids为(N,)的ID数组，payloads为(N, 8)的uint8数组，lengths为可选的(N,)数据长度；
+    按报文系列分组后对每组做向量化的小端视图和缩放，返回列式结果：
+    {报文系列: {'index': 原始行号, 'can_id': ..., 'battery_address': ..., 字段名: 数组}}
+    只处理由规格编译的数值型报文系列，其余行不出现在结果中。
+    """
+    if np is None:
+        raise RuntimeError("decode_batch 需要安装 numpy")
+    ids = np.asarray(can_ids, dtype=np.uint32)
+    data = np.asarray(payloads, dtype=np.uint8)
+    if data.ndim != 2 or data.shape[1] != 8 or data.shape[0] != ids.shape[0]:
+        raise ValueError("payloads 必须是与 can_ids 行数相同的 (N, 8) 数组")
+
+    families = message_families(ids)
+    valid = np.ones(ids.shape[0], dtype=bool)
+    if lengths is not None:
+        valid = np.asarray(lengths) >= 8  # 与逐帧解析一致，长度不足的帧不解码
+
+    result = {}
+    for family in np.unique(families):
+        codec = BATCH_CODECS.get(int(family))
+        if codec is None:
+            continue
+        rows = np.nonzero((families == family) & valid)[0]
+        if rows.size == 0:
+            continue
+        group = data[rows]
+        group_ids = ids[rows]
+        columns = {
+            'index': rows,
+            'can_id': group_ids,
+            'battery_address': group_ids & 0x0F,
+        }
+        for field in codec.fields:
+            columns[field.name] = _decode_column(group, field)
+        result[int(family)] = columns
+    return result
+
+# 分发表项：解析函数（已绑定电池地址）、报文系列、电池地址
+MessageRoute = namedtuple('MessageRoute', ['decoder', 'family', 'battery_address'])
+
+STANDARD_ID_COUNT = 0x800  # 11位标准帧ID空间
+
+def build_dispatch_table():
+    """根据协议定义构建11位ID直接索引的分发表"""
+    table = [None] * STANDARD_ID_COUNT
+    for can_id, parser in FIXED_MESSAGE_PARSERS.items():
+        table[can_id] = MessageRoute(parser, can_id, get_battery_address_from_can_id(can_id))
+    for family, parser in FAMILY_DECODERS.items():
+        for battery_address in range(16):
+            table[family | battery_address] = MessageRoute(
+                partial(parser, battery_address=battery_address), family, battery_address)
+    return table
+
+# 导入时构建一次
+MESSAGE_DISPATCH_TABLE = build_dispatch_table()
+
+def lookup_message_route(can_id):
+    """按CAN ID查找分发表项，不支持的ID返回None"""
+    if 0 <= can_id < STANDARD_ID_COUNT:
+        return MESSAGE_DISPATCH_TABLE[can_id]
+    return None
+
+def protocol_receive_ids():
+    """返回分发表中有解析函数的全部CAN ID（用于接收过滤）"""
+    return [can_id for can_id, route in enumerate(MESSAGE_DISPATCH_TABLE) if route is not None]
+
 def parse_can_message(can_id, data):
     """通用CAN报文解析函数"""
-    if can_id == 0x351:
-        return parse_351_message(data)
-    elif can_id == 0x355:
-        return parse_355_message(data)
-    elif can_id == 0x356:
-        return parse_356_message(data)
-    elif can_id == 0x35A:
-        return parse_35A_message(data)
-    
-    # 新增的报文解析
-    battery_address = get_battery_address_from_can_id(can_id)
-    
-    # 0x20n系列
-    if (can_id & 0xFF0) == 0x200:
-        return parse_20n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x210:
-        return parse_21n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x220:
-        return parse_22n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x230:
-        return parse_23n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x240:
-        return parse_24n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x250:
-        return parse_25n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x260:
-        return parse_26n_message(data, battery_address)
-    
-    # 0x40n系列
-    elif (can_id & 0xFF0) == 0x400:
-        return parse_40n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x410:
-        return parse_41n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x420:
-        return parse_42n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x430:
-        return parse_43n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x440:
-        return parse_44n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x450:
-        return parse_45n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x460:
-        return parse_46n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x470:
-        return parse_47n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x480:
-        return parse_48n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x490:
-        return parse_49n_message(data, battery_address)
-    elif (can_id & 0xFF0) == 0x4A0:
-        return parse_4An_message(data, battery_address)
-    
-    else:
-        return None
\ No newline at end of file
+    route = lookup_message_route(can_id)
+    if route is None:
+        return None
+    return route.decoder(data)
@@ -0,0 +1,130 @@
+# 自适应接收循环
+
+import threading
+import time
+
+# 轮询间隔范围（秒）：有数据时按帧率在两者之间调整，总线空闲时逐次加倍直到空闲上限
+RX_MIN_INTERVAL = 0.005
+RX_MAX_INTERVAL = 0.05
+RX_IDLE_INTERVAL = 0.2
+
+# 按观测帧率调整间隔，使每次读取大约得到该数量的帧
+RX_TARGET_BATCH = 256
+
+# 单次读取的最大帧数（与接收缓冲区一致）
+RX_MAX_FRAMES = 2500
+
+# 循环指标的统计窗口（秒）
+RX_METRICS_WINDOW = 1.0
+
+
+class ReceiveEngine:
+    """接收循环
+
+    总线提供 pending()（VCI_GetReceiveNum）时先查询缓冲区中的帧数，没有数据就不调用接收，
+    有数据时按帧数读取；否则以当前间隔作为接收超时。每次读取后按观测帧率调整下一次轮询间隔，
+    空轮询时间隔加倍，总线空闲时线程在事件上等待而不空转。
+    metrics 每个统计窗口更新一次：每秒轮询次数、每次轮询帧数、空轮询次数。
+    """
+    def __init__(self, bus, read=None, min_interval=RX_MIN_INTERVAL, max_interval=RX_MAX_INTERVAL,
+                 idle_interval=RX_IDLE_INTERVAL, target_batch=RX_TARGET_BATCH,
+                 max_frames=RX_MAX_FRAMES, clock=time.monotonic):
+        self.bus = bus
+        self.read = read or self._read_bus
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.idle_interval = idle_interval
+        self.target_batch = target_batch
+        self.max_frames = max_frames
+        self.clock = clock
+        self.interval = min_interval
+        self.frame_rate = 0.0
+        self._pending = getattr(bus, 'pending', None)
+        self._stop = threading.Event()
+        self._next_poll = clock()
+        self._last_frames_time = None
+
+        # 累计指标
+        self.polls = 0
+        self.frames = 0
+        self.empty_polls = 0
+        # 窗口指标
+        self._window_start = self._next_poll
+        self._window_polls = 0
+        self._window_frames = 0
+        self._window_empty = 0
+        self.metrics = {'polls_per_sec': 0.0, 'frames_per_poll': 0.0, 'empty_polls': 0,
+                        'interval_ms': self.interval * 1000, 'frame_rate': 0.0}
+
+    def _read_bus(self, timeout, max_frames):
+        return self.bus.receive(timeout=timeout, max_frames=max_frames)
+
+    def stop(self):
+        """唤醒正在等待的poll()，之后的poll()立即返回"""
+        self._stop.set()
+
+    def poll(self):
+        """等待到下一次轮询时间并读取一次，返回报文列表或None"""
+        delay = self._next_poll - self.clock()
+        if delay > 0 and self._stop.wait(delay):
+            return None
+        if self._stop.is_set():
+            return None
+
+        start = self.clock()
+        pending = None
+        if self._pending is not None:
+            try:
+                pending = self._pending()
+            except Exception:
+                pending = None
+
+        if pending == 0:
+            messages = None
+        elif pending is None:
+            messages = self.read(int(self.interval * 1000), self.max_frames)
+        else:
+            messages = self.read(0, min(pending, self.max_frames))
+
+        now = self.clock()
+        count = len(messages) if messages else 0
+        self._record(now, count)
+
+        if count:
+            if self._last_frames_time is not None and now > self._last_frames_time:
+                rate = count / (now - self._last_frames_time)
+                self.frame_rate = rate if not self.frame_rate else 0.7 * self.frame_rate + 0.3 * rate
+            self._last_frames_time = now
+            if self.frame_rate:
+                self.interval = min(self.max_interval,
+                                    max(self.min_interval, self.target_batch / self.frame_rate))
+            else:
+                self.interval = self.min_interval
+            # 读满时说明还有积压，立即再读
+            self._next_poll = now if count >= self.max_frames else now + self.interval
+        else:
+            self.interval = min(self.idle_interval, self.interval * 2)
+            # 阻塞型接收已经等待过，这里只补足不阻塞的总线剩余的时间
+            self._next_poll = start + self.interval
+        return messages
+
+    def _record(self, now, count):
+        self.polls += 1
+        self.frames += count
+        self._window_polls += 1
+        self._window_frames += count
+        if not count:
+            self.empty_polls += 1
+            self._window_empty += 1
+
+        elapsed = now - self._window_start
+        if elapsed >= RX_METRICS_WINDOW:
+            self.metrics = {
+                'polls_per_sec': self._window_polls / elapsed,
+                'frames_per_poll': self._window_frames / self._window_polls,
+                'empty_polls': self._window_empty,
+                'interval_ms': self.interval * 1000,
+                'frame_rate': self._window_frames / elapsed,
+            }
+            self._window_start = now
+            self._window_polls = self._window_frames = self._window_empty = 0
@@ -0,0 +1,155 @@
+# 捕获文件回放总线
+
+import time
+
+from can_backends import CANBackend
+from can_capture import CaptureReader
+from can_frame import CANFrame
+from can_protocol_config import parse_can_message
+from can_receiver import RX_MAX_FRAMES
+
+# 最快速度回放时单次receive返回的最大帧数（与VCI_Receive缓冲区一致）
+REPLAY_BATCH_SIZE = 2500
+
+
+class ReplayCANBus(CANBackend):
+    """回放捕获文件的总线，receive()/send() 接口与 CANalystCANBus 一致
+
+    speed=1 按原始帧间隔实时回放，speed=N 加速N倍，speed=0 或 None 为最快速度；
+    stats() 报告已回放帧数和持续帧率，可用于测量完整解析与界面链路的吞吐量。
+    """
+    def __init__(self, filename, speed=1.0, loop=False, batch_size=REPLAY_BATCH_SIZE):
+        self.filename = filename
+        self.speed = speed
+        self.loop = loop
+        self.batch_size = batch_size
+        self.is_connected = False
+        self.finished = False
+        self.sent_count = 0
+        self._reader = None
+        self._index = 0
+        self._start_host = None
+        self._start_capture = None
+        self.frames_replayed = 0
+        self._first_receive = None
+        self._last_receive = None
+
+    # ---- 连接接口（同时兼容 CANalystCANBus 与 FakeCANBus 的命名） ----
+    def connect(self, baudrate=None):
+        self._reader = CaptureReader(self.filename)
+        self._index = 0
+        self._start_host = None
+        self.finished = False
+        self.is_connected = True
+        return True
+
+    def disconnect(self):
+        self.is_connected = False
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    open = connect
+    close = disconnect
+
+    def send(self, can_id, data):
+        """回放时不向总线发送，只计数"""
+        self.sent_count += 1
+        return True
+
+    @property
+    def realtime(self):
+        return bool(self.speed)
+
+    def _restart(self):
+        self._index = 0
+        self._start_host = None
+
+    def _due_count(self, now):
+        """返回按回放时钟已经到期的帧数"""
+        reader = self._reader
+        end = min(len(reader), self._index + self.batch_size)
+        if not self.realtime:
+            return end - self._index
+        elapsed = (now - self._start_host) * self.speed
+        i = self._index
+        while i < end and reader[i].host_time - self._start_capture <= elapsed:
+            i += 1
+        return i - self._index
+
+    def _next_due_in(self, now):
+        """距下一帧到期的时间（秒）"""
+        record = self._reader[self._index]
+        target = self._start_host + (record.host_time - self._start_capture) / self.speed
+        return max(0.0, target - now)
+
+    def receive(self, timeout=100, max_frames=RX_MAX_FRAMES):
+        if not self.is_connected or self._reader is None:
+            return None
+
+        if self._index >= len(self._reader):
+            if self.loop and len(self._reader):
+                self._restart()
+            else:
+                self.finished = True
+                time.sleep(timeout / 1000.0)
+                return None
+
+        now = time.monotonic()
+        if self._start_host is None:
+            self._start_host = now
+            self._start_capture = self._reader[self._index].host_time
+        if self._first_receive is None:
+            self._first_receive = now
+
+        count = self._due_count(now)
+        if count == 0:
+            # 等到下一帧到期或超时
+            wait = min(timeout / 1000.0, self._next_due_in(now))
+            time.sleep(wait)
+            count = self._due_count(time.monotonic())
+            if count == 0:
+                return None
+        count = min(count, max_frames)
+
+        messages = []
+        reader = self._reader
+        for i in range(self._index, self._index + count):
+            record = reader[i]
+            messages.append(CANFrame(record.id, record.data[:record.dlc], record.timestamp))
+        self._index += count
+        self.frames_replayed += count
+        self._last_receive = time.monotonic()
+        return messages
+
+    def stats(self):
+        """返回回放统计：已回放帧数、耗时和持续帧率"""
+        elapsed = 0.0
+        if self._first_receive is not None and self._last_receive is not None:
+            elapsed = self._last_receive - self._first_receive
+        return {
+            'frames': self.frames_replayed,
+            'elapsed': elapsed,
+            'fps': self.frames_replayed / elapsed if elapsed > 0 else 0.0,
+            'finished': self.finished,
+        }
+
+
+def run_decode_benchmark(filename):
+    """以最快速度回放并逐帧解析，返回 (帧数, 耗时秒, 帧/秒)"""
+    bus = ReplayCANBus(filename, speed=0)
+    bus.connect()
+    frames = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            messages = bus.receive(timeout=0)
+            if not messages:
+                break
+            for msg in messages:
+                parse_can_message(msg.id, msg.data)
+            frames += len(messages)
+    finally:
+        bus.disconnect()
+    elapsed = time.perf_counter() - start
+    return frames, elapsed, frames / elapsed if elapsed > 0 else 0.0
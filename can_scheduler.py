@@ -0,0 +1,176 @@
+# 周期报文发送调度
+
+import heapq
+import threading
+import time
+
+# 截止时间相差在该窗口（秒）内的报文合并为一批发送
+SCHEDULER_BATCH_WINDOW = 0.002
+
+
+class PeriodicEntry:
+    """一个周期报文：ID、数据生成函数、周期、相位及其发送统计"""
+    __slots__ = ('can_id', 'producer', 'period', 'phase', 'index', 'deadline',
+                 'sent', 'missed', 'last_sent', 'late', 'lateness_sum', 'lateness_max', 'jitter_max')
+
+    def __init__(self, can_id, producer, period, phase=0.0):
+        self.can_id = can_id
+        self.producer = producer
+        self.period = period
+        self.phase = phase
+        self.index = 0
+        self.deadline = None
+        self.sent = 0
+        self.missed = 0
+        self.last_sent = None
+        self.late = 0.0           # 本次到期的延迟，发送成功后才计入统计
+        self.lateness_sum = 0.0
+        self.lateness_max = 0.0
+        self.jitter_max = 0.0
+
+    def stats(self):
+        return {
+            'period': self.period,
+            'sent': self.sent,
+            'missed': self.missed,
+            'lateness_mean': self.lateness_sum / self.sent if self.sent else 0.0,
+            'lateness_max': self.lateness_max,
+            'jitter_max': self.jitter_max,
+        }
+
+
+class PeriodicScheduler:
+    """周期报文调度器
+
+    每个报文的第k次发送截止时间为 start + phase + k * period（单调时钟），
+    不受发送和界面更新耗时影响而漂移；同时到期的报文合并为一批交给发送队列。
+    错过整周期的发送不补发，只计入 missed。
+    """
+    def __init__(self, tx_queue, on_sent=None, clock=time.monotonic,
+                 batch_window=SCHEDULER_BATCH_WINDOW):
+        self.tx_queue = tx_queue
+        self.on_sent = on_sent
+        self.clock = clock
+        self.batch_window = batch_window
+        self.entries = {}
+        self._heap = []
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_time = None
+
+    def add(self, can_id, producer, period, phase=0.0):
+        """登记周期报文，运行中也可以添加"""
+        entry = PeriodicEntry(can_id, producer, period, phase)
+        with self._lock:
+            self.entries[can_id] = entry
+            if self._start_time is not None:
+                self._schedule_first(entry, self.clock())
+        self._wakeup.set()
+        return entry
+
+    def remove(self, can_id):
+        with self._lock:
+            self.entries.pop(can_id, None)
+
+    def _schedule_first(self, entry, now):
+        elapsed = now - self._start_time - entry.phase
+        entry.index = max(0, int(elapsed // entry.period) + (1 if elapsed > 0 else 0))
+        entry.deadline = self._start_time + entry.phase + entry.index * entry.period
+        self._push(entry)
+
+    def _push(self, entry):
+        self._seq += 1
+        heapq.heappush(self._heap, (entry.deadline, self._seq, entry))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        with self._lock:
+            self._start_time = self.clock()
+            self._heap = []
+            for entry in self.entries.values():
+                entry.index = 0
+                entry.deadline = self._start_time + entry.phase
+                self._push(entry)
+        self._thread = threading.Thread(target=self._run, name='PeriodicScheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def stats(self):
+        """返回 {can_id: 统计字典}"""
+        with self._lock:
+            return {can_id: entry.stats() for can_id, entry in self.entries.items()}
+
+    def _collect_due(self, now):
+        """取出截止时间在批次窗口内的全部报文并安排下一次截止时间"""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now + self.batch_window:
+            _, _, entry = heapq.heappop(heap)
+            if self.entries.get(entry.can_id) is not entry:
+                continue  # 已被移除或替换
+            late = max(0.0, now - entry.deadline)
+            skipped = int(late // entry.period)
+            if skipped:
+                entry.missed += skipped
+                late -= skipped * entry.period
+            entry.late = late
+            due.append(entry)
+            entry.index += 1 + skipped
+            entry.deadline = self._start_time + entry.phase + entry.index * entry.period
+            self._push(entry)
+        return due
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = self.clock()
+            with self._lock:
+                due = self._collect_due(now)
+                next_deadline = self._heap[0][0] if self._heap else None
+
+            if due:
+                frames = []
+                for entry in due:
+                    try:
+                        frames.append((entry.can_id, bytes(entry.producer())))
+                    except Exception as e:
+                        print(f"生成周期报文0x{entry.can_id:03X}失败: {e}")
+                self.tx_queue.extend(frames)
+                sent, dropped = self.tx_queue.flush()
+
+                sent_time = self.clock()
+                sent_ids = {can_id for can_id, _ in sent}
+                for entry in due:
+                    if entry.can_id not in sent_ids:
+                        continue
+                    if entry.last_sent is not None:
+                        jitter = abs((sent_time - entry.last_sent) - entry.period)
+                        if jitter > entry.jitter_max:
+                            entry.jitter_max = jitter
+                    entry.last_sent = sent_time
+                    entry.sent += 1
+                    # 延迟只统计实际发出的帧，与 lateness_mean 的分母一致
+                    entry.lateness_sum += entry.late
+                    if entry.late > entry.lateness_max:
+                        entry.lateness_max = entry.late
+                if self.on_sent:
+                    self.on_sent(sent, dropped)
+                continue
+
+            wait = None if next_deadline is None else max(0.0, next_deadline - self.clock())
+            self._wakeup.wait(wait)
+            self._wakeup.clear()
@@ -0,0 +1,152 @@
+# 硬件时间戳换算：计数器回绕展开，并把设备时钟映射到主机单调时钟
+
+from collections import deque
+
+# CANalyst硬件时间戳单位（秒）与计数器位宽
+HW_TIMESTAMP_TICK = 0.0001
+HW_TIMESTAMP_WRAP = 1 << 32
+
+# 每个窗口取一个最小样本，用最近若干窗口的最小样本拟合偏移和漂移
+SYNC_WINDOW = 1.0
+SYNC_HISTORY = 32
+
+# 漂移估计的上限（晶振误差一般在几十ppm以内）
+MAX_DRIFT = 0.001
+
+
+class DeviceClock:
+    """一个设备硬件时钟到主机单调时钟的映射
+
+    样本为 主机读取时间 - 硬件时间，读取延迟只会让样本偏大，所以只跟踪下包络：
+    低于当前估计的样本立即压低偏移；每个窗口的最小样本记入历史，
+    用最小二乘直线拟合得到漂移（斜率）和偏移（截距）。
+    """
+    def __init__(self, tick=HW_TIMESTAMP_TICK, wrap=HW_TIMESTAMP_WRAP,
+                 window=SYNC_WINDOW, history=SYNC_HISTORY):
+        self.tick = tick
+        self.wrap = wrap
+        self.window = window
+        self.epoch = 0
+        self.wraps = 0
+        self.last_raw = None
+        self.offset = None  # 参考点处的偏移（秒）
+        self.drift = 0.0    # 偏移随硬件时间的变化率
+        self.samples = 0
+        self._ref = 0.0
+        self._window_start = None
+        self._window_min = None
+        self._minima = deque(maxlen=history)
+
+    def unwrap(self, raw):
+        """把原始计数值展开为单调递增的计数（必须按接收顺序调用）"""
+        raw = int(raw) % self.wrap
+        last = self.last_raw
+        if last is not None and raw < last and last - raw > self.wrap // 2:
+            self.epoch += self.wrap
+            self.wraps += 1
+        self.last_raw = raw
+        return self.epoch + raw
+
+    def offset_at(self, hw_time):
+        return self.offset + self.drift * (hw_time - self._ref)
+
+    def update(self, ticks, host_time):
+        """用一个 (展开后的计数, 主机单调时间) 样本更新估计"""
+        hw_time = ticks * self.tick
+        sample = host_time - hw_time
+        self.samples += 1
+        if self.offset is None:
+            self.offset = sample
+            self._ref = hw_time
+        else:
+            excess = self.offset_at(hw_time) - sample
+            if excess > 0:
+                self.offset -= excess
+
+        window_min = self._window_min
+        if window_min is None or sample < window_min[1]:
+            self._window_min = (hw_time, sample)
+        if self._window_start is None:
+            self._window_start = host_time
+        elif host_time - self._window_start >= self.window:
+            self._minima.append(self._window_min)
+            self._window_start = host_time
+            self._window_min = None
+            if len(self._minima) >= 2:
+                self._fit()
+
+    def _fit(self):
+        """对各窗口最小样本做最小二乘直线拟合"""
+        count = len(self._minima)
+        ref = self._minima[0][0]
+        sum_x = sum_y = sum_xx = sum_xy = 0.0
+        for hw_time, sample in self._minima:
+            x = hw_time - ref
+            sum_x += x
+            sum_y += sample
+            sum_xx += x * x
+            sum_xy += x * sample
+        denominator = count * sum_xx - sum_x * sum_x
+        if denominator <= 0:
+            return
+        slope = (count * sum_xy - sum_x * sum_y) / denominator
+        slope = max(-MAX_DRIFT, min(MAX_DRIFT, slope))
+        intercept = (sum_y - slope * sum_x) / count
+        # 拟合线整体平移到最小样本之下，保持下包络
+        intercept -= max(0.0, max(intercept + slope * (hw_time - ref) - sample
+                                  for hw_time, sample in self._minima))
+        self._ref = ref
+        self.offset = intercept
+        self.drift = slope
+
+    def to_host(self, ticks):
+        """把展开后的计数换算为主机单调时钟（秒）"""
+        hw_time = ticks * self.tick
+        if self.offset is None:
+            return hw_time
+        return hw_time + self.offset_at(hw_time)
+
+    def stamp(self, messages, host_time):
+        """为一批按接收顺序排列的报文展开计数并写入 frame.time（主机单调时钟）
+
+        用本批最后一帧更新估计：它距读取时刻最近，读取延迟最小
+        """
+        ticks = [self.unwrap(msg.timestamp) for msg in messages]
+        if ticks:
+            self.update(ticks[-1], host_time)
+        for msg, value in zip(messages, ticks):
+            msg.time = self.to_host(value)
+        return ticks
+
+    def stats(self):
+        return {'offset': self.offset, 'drift_ppm': self.drift * 1e6,
+                'wraps': self.wraps, 'samples': self.samples}
+
+
+class TimestampService:
+    """按设备管理时钟映射，为没有硬件时间戳的总线用主机读取时间打戳"""
+    def __init__(self, **clock_options):
+        self.clock_options = clock_options
+        self.clocks = {}
+
+    def clock(self, device=0):
+        clock = self.clocks.get(device)
+        if clock is None:
+            clock = self.clocks[device] = DeviceClock(**self.clock_options)
+        return clock
+
+    def stamp(self, messages, host_time, device=0, hardware=True):
+        """为一批报文写入 frame.time；已带时间的报文（如多通道合并）保持不变"""
+        if not messages:
+            return
+        if hardware:
+            pending = [msg for msg in messages if msg.time is None]
+            if pending:
+                self.clock(device).stamp(pending, host_time)
+        else:
+            for msg in messages:
+                if msg.time is None:
+                    msg.time = host_time
+
+    def reset(self):
+        self.clocks.clear()
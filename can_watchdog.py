@@ -0,0 +1,172 @@
+# 报文超时监视：按 (报文系列, 电池地址) 跟踪周期报文是否按时到达
+
+import threading
+import time
+from collections import namedtuple
+
+# 时间轮刻度（秒）与槽数：槽数 × 刻度 覆盖最长周期时，大多数定时器一圈内到期
+WATCHDOG_TICK = 0.1
+WATCHDOG_SLOTS = 1024
+
+# 超时时间 = max(周期 × WATCHDOG_TOLERANCE, 周期 + WATCHDOG_MARGIN)：余量与周期成比例，容纳到达抖动和
+# 发送端时钟漂移（60秒周期的报文可晚到12秒），短周期至少留一个刻度。时间轮在截止时间之后的第一个刻度边界触发，
+# 因此报文丢失后约 0.2 个周期 + 1个刻度内报告，小于一个周期
+WATCHDOG_TOLERANCE = 1.2
+WATCHDOG_MARGIN = WATCHDOG_TICK
+
+STREAM_STALE = 'stale'
+STREAM_RECOVERED = 'recovered'
+
+WatchdogEvent = namedtuple('WatchdogEvent', ['kind', 'family', 'battery_address', 'last_seen', 'timeout'])
+
+
+class TimerWheel:
+    """哈希时间轮
+
+    定时器按到期刻度（截止时间之后的第一个刻度边界，不会提前触发）放入 刻度 % 槽数 的槽中，advance() 只处理经过的槽，
+    检查成本与跟踪的定时器数量无关。重新设置更晚的截止时间时只更新记录（惰性重排），
+    原条目到期时发现截止时间已推后再放入新的槽。
+    """
+    def __init__(self, tick=WATCHDOG_TICK, slots=WATCHDOG_SLOTS, now=0.0):
+        self.tick = tick
+        self.slots = slots
+        self._wheel = [[] for _ in range(slots)]
+        self._entries = {}  # key -> [截止时间, 所在刻度]
+        self._current = self._tick_of(now)
+
+    def _tick_of(self, t):
+        return int(t // self.tick)
+
+    def _expiry_tick(self, deadline):
+        """截止时间之后的第一个刻度边界"""
+        return self._tick_of(deadline) + 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _insert(self, key, entry):
+        tick = max(self._expiry_tick(entry[0]), self._current + 1)
+        entry[1] = tick
+        self._wheel[tick % self.slots].append((key, tick))
+
+    def schedule(self, key, deadline):
+        """设置或更新定时器的截止时间"""
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [deadline, 0]
+            self._insert(key, entry)
+            return
+        entry[0] = deadline
+        if self._expiry_tick(deadline) < entry[1]:
+            # 提前到期时需要放入更早的槽，旧条目到期时按刻度不符丢弃
+            self._insert(key, entry)
+
+    def cancel(self, key):
+        self._entries.pop(key, None)
+
+    def advance(self, now):
+        """推进到now，返回已到期的key列表"""
+        target = self._tick_of(now)
+        steps = target - self._current
+        if steps <= 0:
+            return []
+        expired = []
+        jump = steps > self.slots  # 长时间未推进时每个槽只处理一次
+        start = self._current
+        for i in range(1, min(steps, self.slots) + 1):
+            tick = start + i
+            cutoff = target if jump else tick
+            index = tick % self.slots
+            bucket = self._wheel[index]
+            if not bucket:
+                continue
+            self._wheel[index] = []
+            self._current = cutoff
+            for key, entry_tick in bucket:
+                entry = self._entries.get(key)
+                if entry is None or entry[1] != entry_tick:
+                    continue  # 已取消或已移到其他槽
+                if entry_tick > cutoff:
+                    self._wheel[index].append((key, entry_tick))  # 后面圈次才到期
+                elif self._expiry_tick(entry[0]) > cutoff:
+                    self._insert(key, entry)  # 截止时间已推后，惰性重排
+                else:
+                    del self._entries[key]
+                    expired.append(key)
+        self._current = target
+        return expired
+
+
+class StreamWatchdog:
+    """按 (报文系列, 电池地址) 监视周期报文
+
+    每个报文流在第一次收到时登记，超时时间取 max(周期 × tolerance, 周期 + margin)（也可按报文系列单独设置），
+    即下一帧应到达的时刻再加上抖动余量，报文丢失后一个周期内即可报告；
+    feed() 记录到达并推后截止时间，check() 推进时间轮并返回超时(stale)与恢复(recovered)事件。
+    """
+    def __init__(self, periods, tolerance=WATCHDOG_TOLERANCE, margin=WATCHDOG_MARGIN, tick=WATCHDOG_TICK,
+                 slots=WATCHDOG_SLOTS, clock=time.monotonic):
+        self.clock = clock
+        self.timeouts = {family: max(period * tolerance, period + margin) for family, period in periods.items()}
+        self.wheel = TimerWheel(tick, slots, now=clock())
+        self.last_seen = {}
+        self.stale = set()
+        self.stale_events = 0
+        self.recovered_events = 0
+        self._pending = []  # feed() 中产生、等待 check() 返回的恢复事件
+        self._lock = threading.Lock()
+
+    def set_timeout(self, family, timeout):
+        """单独设置某个报文系列的超时时间（秒）"""
+        self.timeouts[family] = timeout
+
+    def feed(self, family, battery_address, now=None):
+        """记录一帧报文到达，未设置周期的报文系列忽略"""
+        timeout = self.timeouts.get(family)
+        if timeout is None:
+            return
+        if now is None:
+            now = self.clock()
+        key = (family, battery_address)
+        with self._lock:
+            self.last_seen[key] = now
+            self.wheel.schedule(key, now + timeout)
+            if key in self.stale:
+                self.stale.discard(key)
+                self.recovered_events += 1
+                self._pending.append(WatchdogEvent(STREAM_RECOVERED, family, battery_address, now, timeout))
+
+    def check(self, now=None):
+        """推进时间轮，返回自上次检查以来的事件列表"""
+        if now is None:
+            now = self.clock()
+        with self._lock:
+            events, self._pending = self._pending, []
+            for key in self.wheel.advance(now):
+                family, battery_address = key
+                self.stale.add(key)
+                self.stale_events += 1
+                events.append(WatchdogEvent(STREAM_STALE, family, battery_address,
+                                            self.last_seen.get(key), self.timeouts.get(family)))
+        return events
+
+    def forget(self, family, battery_address):
+        """停止跟踪某个报文流"""
+        key = (family, battery_address)
+        with self._lock:
+            self.wheel.cancel(key)
+            self.last_seen.pop(key, None)
+            self.stale.discard(key)
+
+    def stats(self):
+        """返回监视统计"""
+        with self._lock:
+            return {
+                'tracked': len(self.last_seen),
+                'stale': len(self.stale),
+                'stale_events': self.stale_events,
+                'recovered_events': self.recovered_events,
+            }
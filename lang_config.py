@@ -11,6 +11,17 @@ LANGUAGES = {
         'status': "状态",
         'send': "发送",
         'receive': "接收",
+        'dropped': "丢弃",
+        'rx_loop': "接收轮询",
+        'rx_loop_stats': "{polls:.1f}次/秒  {frames:.1f}帧/次  空轮询{empty}  重复{repeat:.0%}",
+        'bus_health': "总线状态",
+        'bus_health_stats': "REC {rec}  TEC {tec}  溢出 {overruns}  总线关闭 {bus_off_events}  "
+                            "接收错误 {receive_errors}  主机丢弃 {host_drops}  主机接收 {host_rx_per_sec:.0f}帧/秒",
+        'export_bus_health': "导出总线状态",
+        'identity': "身份信息",
+        'refresh_identity': "刷新身份信息",
+        'export_identity': "导出身份信息",
+        'log_writer_stats': "写入队列: {depth}  已写入: {kb:.1f} KB  丢弃: {dropped}",
         'heartbeat_status': "心跳状态",
         'stat_info': "统计信息",
         'send_data': "发送数据",
@@ -18,10 +29,14 @@ LANGUAGES = {
         'log': "通信日志",
         'clear_log': "清空日志",
         'auto_save_log': "自动保存日志",
+        'raw_capture': "原始报文捕获",
+        'protocol_filter': "仅接收协议报文",
+        'dual_channel': "双通道",
         'save_log': "保存日志",
         'language': "语言/Language:",
         'connection_settings': "连接设置",
         'control': "控制",
+        'backend': "后端:",
         'device_type': "设备类型:",
         'device_index': "设备索引:",
         'can_channel': "CAN通道:",
@@ -39,6 +54,7 @@ LANGUAGES = {
         'start_send_status': "正在发送",
         'stopped': "已停止",
         'normal': "正常",
+        'missed': "漏发",
         'waiting': "等待",
         'stop': "停止",
         'yes': "是",
@@ -189,26 +205,18 @@ LANGUAGES = {
             ('esp32可用堆大小', 'esp32_free_heap_size_byte'),
             ('esp32温度', 'esp32_temperature_celsius'),
         ],
-        'table_450': [
-            ('控制器版本前8CHAR', 'controller_version_part1'),
-        ],
-        'table_460': [
-            ('控制器版本后8CHAR', 'controller_version_part2'),
-        ],
-        'table_470': [
-            ('BMS版本前8CHAR', 'bms_version_part1'),
-        ],
-        'table_480': [
-            ('BMS版本后8CHAR', 'bms_version_part2'),
-        ],
         'table_490': [
             ('x轴加速度', 'accelerometer_x'),
             ('y轴加速度', 'accelerometer_y'),
             ('z轴加速度', 'accelerometer_z'),
         ],
-        'table_4A0': [
+        # 0x45n-0x48n 版本字符串与 0x4An MAC地址/模块ID 按电池重组后显示
+        'table_identity': [
+            ('控制器版本', 'controller_version'),
+            ('BMS版本', 'bms_version'),
             ('ESP32MAC地址', 'esp32_mac_address'),
             ('模块ID', 'module_id'),
+            ('刷新响应时间', 'response_time'),
         ],
     },
     'en': {
@@ -223,6 +231,17 @@ LANGUAGES = {
         'status': "Status",
         'send': "Send",
         'receive': "Receive",
+        'dropped': "Dropped",
+        'rx_loop': "Rx Polls",
+        'rx_loop_stats': "{polls:.1f}/s  {frames:.1f} frames/poll  empty {empty}  repeat {repeat:.0%}",
+        'bus_health': "Bus Health",
+        'bus_health_stats': "REC {rec}  TEC {tec}  Overruns {overruns}  Bus-off {bus_off_events}  "
+                            "Rx errors {receive_errors}  Host drops {host_drops}  Host rx {host_rx_per_sec:.0f} fps",
+        'export_bus_health': "Export Bus Health",
+        'identity': "Identity",
+        'refresh_identity': "Refresh Identity",
+        'export_identity': "Export Identity",
+        'log_writer_stats': "Write queue: {depth}  Written: {kb:.1f} KB  Dropped: {dropped}",
         'heartbeat_status': "Heartbeat",
         'stat_info': "Statistics",
         'send_data': "Send Data",
@@ -230,10 +249,14 @@ LANGUAGES = {
         'log': "Communication Log",
         'clear_log': "Clear Log",
         'auto_save_log': "Auto Save Log",
+        'raw_capture': "Raw Capture",
+        'protocol_filter': "Protocol IDs Only",
+        'dual_channel': "Dual Channel",
         'save_log': "Save Log",
         'language': "Language:",
         'connection_settings': "Connection Settings",
         'control': "Control",
+        'backend': "Backend:",
         'device_type': "Device Type:",
         'device_index': "Device Index:",
         'can_channel': "CAN Channel:",
@@ -251,6 +274,7 @@ LANGUAGES = {
         'start_send_status': "Sending",
         'stopped': "Stopped",
         'normal': "Normal",
+        'missed': "Missed",
         'waiting': "Waiting",
         'stop': "Stop",
         'yes': "Yes",
@@ -407,26 +431,17 @@ LANGUAGES = {
             ('esp32_free_heap_size_byte', 'esp32_free_heap_size_byte'),
             ('esp32_temperature_celsius', 'esp32_temperature_celsius'),
         ],
-        'table_450': [
-            ('controller_version first 8 chars', 'controller_version_part1'),
-        ],
-        'table_460': [
-            ('controller_version last 8 chars', 'controller_version_part2'),
-        ],
-        'table_470': [
-            ('BMS_version_first8CHAR', 'bms_version_part1'),
-        ],
-        'table_480': [
-            ('BMS_version_last8CHAR', 'bms_version_part2'),
-        ],
         'table_490': [
             ('accelerometer_x', 'accelerometer_x'),
             ('accelerometer_y', 'accelerometer_y'),
             ('accelerometer_z', 'accelerometer_z'),
         ],
-        'table_4A0': [
+        'table_identity': [
+            ('controller_version', 'controller_version'),
+            ('bms_version', 'bms_version'),
             ('esp32_mac_address', 'esp32_mac_address'),
             ('module_id', 'module_id'),
+            ('refresh_response_time', 'response_time'),
         ],
     }
 } 
\ No newline at end of file